@@ -1,61 +1,133 @@
 from langchain_openai import ChatOpenAI
-from langchain_experimental.agents import create_pandas_dataframe_agent
-from langchain.memory import ConversationBufferMemory
-import pandas as pd
+from langchain.agents import AgentExecutor, create_openai_tools_agent
+from langchain.agents.agent import RunnableMultiActionAgent
+from langchain.agents.openai_functions_agent.base import OpenAIFunctionsAgent
+from langchain_core.messages import SystemMessage
+from langchain_core.prompts import MessagesPlaceholder
 import os
+import threading
 from dotenv import load_dotenv
+from agent.memory import MEMORY_KEY, build_memory
+from agent.pool import AgentPool
+from agent.sandbox import STATELESS_PROMPT, SandboxedPythonTool, make_python_tool
+from analytics.tracing import traced
+from data.profile import get_profile_text
+from data.store import load_dataset
 
-def load_agent():
+AGENT_PREFIX = (
+           "You are working with a pandas dataframe in Python. The name of the dataframe is `df`. "
+           "Product, Location and Platform are categoricals: pass observed=True to groupby."
+)
+REQUIRED_COLUMNS = ["Units_Sold", "Revenue", "Cost_Price", "Unit_Price", "Profit", "Product", "Location", "Inventory_After", "Date"]
+
+def build_llm():
            load_dotenv()
            api_key = os.getenv("OPENAI_API_KEY")
            os.environ["OPENAI_API_KEY"] = api_key
+           # stream_usage keeps per-turn token counts available when streaming
+           return ChatOpenAI(model="gpt-3.5-turbo", temperature=0, stream_usage=True)
+
+def new_memory(llm):
+           # Token-bounded; see agent/memory.py for the BIZBUDDY_MEMORY_* settings
+           return build_memory(llm)
 
-           sheet_url = "https://docs.google.com/spreadsheets/d/1ISS7IQOMPrAEqU7lnpJYM5W2zd4oynntnmMTiokiVNU/export?format=csv"
-           df = pd.read_csv(sheet_url)
-
-           if "Order Date" in df.columns:
-               df.rename(columns={"Order Date": "Date"}, inplace=True)
-           if "Date" in df.columns:
-               try:
-                   df["Date"] = pd.to_datetime(df["Date"], errors='coerce')
-               except Exception as e:
-                   print("⚠️ Date conversion error:", e)
-
-           if "Product_Expiry_Date" in df.columns:
-               df.rename(columns={"Product_Expiry_Date": "Expiry Date"}, inplace=True)
-               try:
-                   df["Expiry Date"] = pd.to_datetime(df["Expiry Date"], errors='coerce')
-               except Exception as e:
-                   print("⚠️ Expiry Date conversion error:", e)
-
-           required_cols = ["Units_Sold", "Revenue", "Cost_Price", "Unit_Price", "Profit", "Product", "Location", "Inventory_After", "Date"]
-           missing_cols = [col for col in required_cols if col not in df.columns]
+def build_agent(llm, df):
+           missing_cols = [col for col in REQUIRED_COLUMNS if col not in df.columns]
            if missing_cols:
-               print(f"⚠️ Missing key columns: {missing_cols}")
-
-           print("🧾 Columns in dataset:", df.columns.tolist())
-           print("🔍 Sample rows:\n", df.head())
-
-           for col in required_cols:
-               if col not in df.columns:
-                   raise ValueError(f"Missing required column: {col}")
-
-           llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
-           memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-
-           agent = create_pandas_dataframe_agent(
-               llm,
-               df,
-               verbose=True,
-               memory=memory,
-               handle_parsing_errors=True,
-               agent_type="openai-tools",
-               allow_dangerous_code=True,
+               raise ValueError(f"Missing required columns: {missing_cols}")
+
+           # Generated code runs in the sandbox worker pool unless BIZBUDDY_SANDBOX=0
+           tools = [make_python_tool(df)]
+           prefix = AGENT_PREFIX
+           if isinstance(tools[0], SandboxedPythonTool):
+               prefix += " " + STATELESS_PROMPT
+
+           # A compact schema/statistics profile stands in for raw sample rows,
+           # and chat_history lets the bounded session memory reach the model
+           system_message = SystemMessage(content=prefix + "\n\n" + get_profile_text(df))
+           prompt = OpenAIFunctionsAgent.create_prompt(
+               system_message=system_message,
+               extra_prompt_messages=[MessagesPlaceholder(variable_name=MEMORY_KEY, optional=True)],
+           )
+           agent = RunnableMultiActionAgent(
+               runnable=create_openai_tools_agent(llm, tools, prompt),
+               input_keys_arg=["input"],
+               return_keys_arg=["output"],
            )
 
-           return agent
+           # Built once per dataset version; sessions get copies with their own memory
+           return AgentExecutor(agent=agent, tools=tools, verbose=True, handle_parsing_errors=True)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_agent_pool():
+           global _pool
+           with _pool_lock:
+               if _pool is None:
+                   _pool = AgentPool(build_llm, build_agent, new_memory, cache_name="agent_templates")
+               return _pool
+
+def get_session_agent(state, df=None):
+           # Shared store already renamed and coerced the columns; the view keeps
+           # anything generated code writes out of the shared frame
+           df = load_dataset().view() if df is None else df
+           return get_agent_pool().session_agent(state, df)
+
+def reset_session_memory(state):
+           get_agent_pool().reset_memory(state)
+
+@traced("load_agent")
+def load_agent(df=None):
+           df = load_dataset().view() if df is None else df
+           return get_agent_pool().create(df)
+
+def main(argv=None):
+           import argparse
+
+           from data.frame import enable_copy_on_write
+           enable_copy_on_write()
+
+           parser = argparse.ArgumentParser(description="Ask BizBuddy questions from the command line.")
+           parser.add_argument("--questions", help="file of questions (one per line, or .jsonl with a 'question' field)")
+           parser.add_argument("--out", default="answers.jsonl", help="where to write answers and metrics (JSONL)")
+           parser.add_argument("--workers", type=int, default=4, help="questions answered concurrently")
+           parser.add_argument("--llm", choices=["openai", "fake", "replay", "record"], default="openai",
+                               help="fake: offline scripted model; replay/record: use or fill --recording")
+           parser.add_argument("--recording", default="llm_recording.jsonl", help="recorded LLM responses (JSONL)")
+           parser.add_argument("--data", help="dataset location to use instead of the default (CSV/Parquet file, sqlite:///... or duckdb:///...)")
+           parser.add_argument("--no-router", action="store_true", help="send every question to the agent")
+           args = parser.parse_args(argv)
+
+           if not args.questions:
+               agent = load_agent()
+               response = agent.invoke("What are the top 3 selling products by total number of Units_Sold?")
+               print(response)
+               return
+
+           from agent.batch import FakeAgentModel, RecordedChatModel, read_questions, run_batch, write_results
+           from data.store import DatasetStore
+
+           if args.llm == "fake":
+               llm = FakeAgentModel()
+           elif args.llm == "replay":
+               llm = RecordedChatModel(path=args.recording)
+           elif args.llm == "record":
+               llm = RecordedChatModel(path=args.recording, inner=build_llm())
+           else:
+               llm = build_llm()
+           df = DatasetStore({"local": args.data}).get("local").view() if args.data else load_dataset().view()
+
+           results = run_batch(read_questions(args.questions), llm, df, workers=args.workers, use_router=not args.no_router)
+           write_results(results, args.out)
+           if not results:
+               print(f"⚠️ No questions in {args.questions}; wrote an empty {args.out}")
+               return
+           latencies = sorted(r["latency_ms"] for r in results)
+           errors = sum(1 for r in results if r["error"])
+           print(f"✅ {len(results)} answers written to {args.out} "
+                 f"(p50 {latencies[len(latencies) // 2]:.1f} ms, max {latencies[-1]:.1f} ms, {errors} errors)")
 
 if __name__ == "__main__":
-           agent = load_agent()
-           response = agent.invoke("What are the top 3 selling products by total number of Units_Sold?")
-           print(response)
+           # Run as a module from the repo root: python -m agent.agent --questions questions.txt --llm fake
+           main()
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.pydantic_v1 import PrivateAttr
+
+from agent.agent import build_agent
+from agent.memory import TokenUsageHandler, build_memory
+from agent.pool import AgentPool
+from agent.router import lookup_answer
+
+
+class FakeAgentModel(BaseChatModel):
+    """Offline stand-in for the LLM: asks the python tool for len(df), then
+    answers with whatever the tool returned. Exercises the full agent loop
+    (prompt, tool call, sandbox, final answer) without any network."""
+
+    code: str = "len(df)"
+
+    @property
+    def _llm_type(self):
+        return "fake-agent"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        last = messages[-1]
+        if isinstance(last, ToolMessage):
+            message = AIMessage(content=f"The dataset answer is {last.content}.")
+        else:
+            call = {"name": "python_repl_ast", "args": {"query": self.code}, "id": f"call_{len(messages)}"}
+            message = AIMessage(content="", tool_calls=[call])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _message_key(messages):
+    payload = [(m.type, m.content, getattr(m, "tool_calls", None) or None) for m in messages]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class RecordedChatModel(BaseChatModel):
+    """Replays LLM responses recorded in a JSONL file, keyed by the prompt.
+
+    With ``inner`` set it records instead: every call goes to the real model
+    and its response is appended to the file for later offline runs.
+    """
+
+    path: str
+    inner: BaseChatModel = None
+    _responses: dict = PrivateAttr(default_factory=dict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    record = json.loads(line)
+                    self._responses[record["key"]] = record["message"]
+        except FileNotFoundError:
+            if self.inner is None:
+                raise
+
+    @property
+    def _llm_type(self):
+        return "recorded"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        key = _message_key(messages)
+        if key in self._responses:
+            recorded = self._responses[key]
+            message = AIMessage(content=recorded["content"], tool_calls=recorded["tool_calls"])
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        if self.inner is None:
+            raise KeyError(f"No recorded response for prompt {key[:12]}; re-run with --record")
+        result = self.inner._generate(messages, stop=stop, **kwargs)
+        message = result.generations[0].message
+        recorded = {"content": message.content, "tool_calls": message.tool_calls}
+        with self._lock:
+            self._responses[key] = recorded
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"key": key, "message": recorded}) + "\n")
+        return result
+
+
+class ToolCallCounter(BaseCallbackHandler):
+    def __init__(self):
+        self.count = 0
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        self.count += 1
+
+
+def read_questions(path):
+    # Plain text (one question per line) or JSONL with a "question" field
+    with open(path) as f:
+        lines = [line.strip() for line in f if line.strip()]
+    if path.endswith(".jsonl"):
+        return [json.loads(line)["question"] for line in lines]
+    return lines
+
+
+def run_batch(questions, llm, df, workers=4, use_router=True):
+    # Questions are independent, so a plain buffer memory per session is enough
+    pool = AgentPool(lambda: llm, build_agent, lambda model: build_memory(model, mode="buffer"))
+    pool.template(df)
+
+    def run_one(index, question):
+        usage, tools = TokenUsageHandler(), ToolCallCounter()
+        route, answer, error = "agent", None, None
+        start = time.perf_counter()
+        try:
+            answer = lookup_answer(question, df) if use_router else None
+            if answer is not None:
+                route = "router"
+            else:
+                # Fresh session per question so answers don't depend on ordering
+                result = pool.create(df).invoke({"input": question}, config={"callbacks": [usage, tools]})
+                answer = result["output"]
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return {
+            "index": index,
+            "question": question,
+            "answer": answer,
+            "route": route,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+            "tool_calls": tools.count,
+            **usage.as_dict(),
+            "error": error,
+        }
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_one, range(len(questions)), questions))
+
+
+def write_results(results, path):
+    with open(path, "w") as f:
+        for result in results:
+            f.write(json.dumps(result, default=str) + "\n")
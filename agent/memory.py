@@ -0,0 +1,90 @@
+import os
+from contextlib import contextmanager
+from typing import Any, List, Optional
+
+from langchain.memory import ConversationBufferMemory, ConversationSummaryBufferMemory, ConversationTokenBufferMemory
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage, get_buffer_string
+from langchain_core.output_parsers import StrOutputParser
+
+MEMORY_KEY = "chat_history"
+# "summary": recent turns verbatim, older ones rolled into a running summary
+# "window": recent turns only; "buffer": everything (unbounded, the old default)
+MEMORY_MODE = os.getenv("BIZBUDDY_MEMORY_MODE", "summary")
+MEMORY_TOKEN_LIMIT = int(os.getenv("BIZBUDDY_MEMORY_TOKENS", "1200"))
+
+
+class SummaryBufferMemory(ConversationSummaryBufferMemory):
+    """Summary buffer whose summarization calls report to the turn's callbacks.
+
+    The agent saves the turn to memory outside its own callback scope, so
+    without this the summarization tokens never reach TokenUsageHandler.
+    """
+
+    callbacks: Optional[List[Any]] = None
+
+    def predict_new_summary(self, messages: List[BaseMessage], existing_summary: str) -> str:
+        new_lines = get_buffer_string(messages, human_prefix=self.human_prefix, ai_prefix=self.ai_prefix)
+        chain = self.prompt | self.llm | StrOutputParser()
+        return chain.invoke({"summary": existing_summary, "new_lines": new_lines}, config={"callbacks": self.callbacks})
+
+
+@contextmanager
+def memory_callbacks(memory, callbacks):
+    # Route this turn's summarization calls to the turn's callbacks
+    if not isinstance(memory, SummaryBufferMemory) or not callbacks:
+        yield
+        return
+    memory.callbacks = list(callbacks)
+    try:
+        yield
+    finally:
+        memory.callbacks = None
+
+
+def build_memory(llm, mode=MEMORY_MODE, max_token_limit=MEMORY_TOKEN_LIMIT):
+    # Explicit keys: streamed runs also return "messages", which would
+    # otherwise leave the memory guessing which output to save
+    keys = {"memory_key": MEMORY_KEY, "input_key": "input", "output_key": "output", "return_messages": True}
+    if mode == "buffer":
+        return ConversationBufferMemory(**keys)
+    if mode == "window":
+        return ConversationTokenBufferMemory(llm=llm, max_token_limit=max_token_limit, **keys)
+    if mode == "summary":
+        return SummaryBufferMemory(llm=llm, max_token_limit=max_token_limit, **keys)
+    raise ValueError(f"Unknown memory mode: {mode}")
+
+
+def memory_tokens(memory, llm=None):
+    # Tokens the memory adds to the next prompt; None when there's no model to count with
+    llm = llm or getattr(memory, "llm", None)
+    if llm is None:
+        return None
+    messages = memory.load_memory_variables({})[MEMORY_KEY]
+    return llm.get_num_tokens_from_messages(messages) if messages else 0
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """Adds up the prompt/completion tokens of every LLM call in one turn."""
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.llm_calls = 0
+
+    def on_llm_end(self, response, **kwargs):
+        self.llm_calls += 1
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage:
+            self.prompt_tokens += usage.get("prompt_tokens", 0)
+            self.completion_tokens += usage.get("completion_tokens", 0)
+            return
+        # Streaming responses carry usage on the message instead
+        for generations in response.generations:
+            for generation in generations:
+                metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                self.prompt_tokens += metadata.get("input_tokens", 0)
+                self.completion_tokens += metadata.get("output_tokens", 0)
+
+    def as_dict(self):
+        return {"prompt_tokens": self.prompt_tokens, "completion_tokens": self.completion_tokens, "llm_calls": self.llm_calls}
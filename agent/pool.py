@@ -0,0 +1,83 @@
+import threading
+
+import pandas as pd
+
+from analytics.caching import VersionedCache
+
+
+def _copy(model, **update):
+    # pydantic's copy() drops fields declared with exclude=True, which on
+    # chains and tools are the callbacks, so carry those over explicitly
+    excluded = {name: getattr(model, name) for name in model.__exclude_fields__ or {}}
+    return model.copy(update={**excluded, **update})
+
+
+def _session_tool(tool):
+    # Each session gets its own tool locals (and its own copy-on-write view of
+    # any dataframe in them) so generated code can't leak state across users
+    if not isinstance(getattr(tool, "locals", None), dict):
+        return tool
+    local_vars = {
+        name: value.copy(deep=False) if isinstance(value, pd.DataFrame) else value
+        for name, value in tool.locals.items()
+    }
+    return _copy(tool, locals=local_vars)
+
+
+class AgentPool:
+    """Shares the expensive agent pieces across every session in the process.
+
+    The LLM client (and its pooled HTTP connections) is built once, and the
+    agent runnable plus tool definitions once per dataset version. A session
+    agent is a shallow copy of that template with its own memory and tool
+    locals, so creating or resetting one never reloads anything.
+    """
+
+    def __init__(self, build_llm, build_agent, new_memory, cache_name=None):
+        self._build_llm = build_llm
+        self._build_agent = build_agent
+        self._new_memory = new_memory
+        self._llm = None
+        self._lock = threading.Lock()
+        # Only the app's pool names its cache; batch runs and benchmarks build
+        # their own pools and must not take over the registered entry
+        self._templates = VersionedCache(max_entries=4, name=cache_name)
+
+    def llm(self):
+        with self._lock:
+            if self._llm is None:
+                self._llm = self._build_llm()
+            return self._llm
+
+    def template(self, df):
+        return self._templates.get_or_compute(
+            df.attrs.get("dataset_version"), lambda: self._build_agent(self.llm(), df)
+        )
+
+    def create(self, df, memory=None):
+        template = self.template(df)
+        return _copy(
+            template,
+            memory=memory if memory is not None else self._new_memory(self.llm()),
+            tools=[_session_tool(tool) for tool in template.tools],
+        )
+
+    def session_agent(self, state, df):
+        # `state` is any mutable mapping, e.g. st.session_state
+        version, dataset = df.attrs.get("dataset_version"), df.attrs.get("dataset_name")
+        agent = state.get("agent")
+        if agent is None or state.get("agent_version") != version:
+            # New data: rebuild on the new template but keep the conversation,
+            # unless the session moved to another tenant's dataset
+            keep = agent is not None and state.get("agent_dataset") == dataset
+            agent = self.create(df, memory=agent.memory if keep else None)
+            state["agent"] = agent
+            state["agent_version"] = version
+            state["agent_dataset"] = dataset
+        return agent
+
+    @staticmethod
+    def reset_memory(state):
+        agent = state.get("agent")
+        if agent is not None and agent.memory is not None:
+            agent.memory.clear()
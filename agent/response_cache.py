@@ -0,0 +1,179 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from analytics.caching import register_cache
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "of", "for", "to", "in", "on", "by", "with",
+    "what", "which", "who", "show", "me", "tell", "give", "list", "please", "can", "you", "i", "we",
+    "our", "my", "do", "does", "did", "have", "has", "there", "about", "all", "much", "many", "during",
+}
+# Questions that lean on earlier turns are answered differently per session
+CONTEXT_WORDS = {"it", "its", "that", "those", "these", "them", "they", "same", "previous", "above", "else", "more"}
+# Words that change what a question asks without changing how similar it
+# looks; mapped to one term per meaning so "dip" and "drop" agree but "rise"
+# and "drop" don't
+MEANING_WORDS = {
+    **dict.fromkeys(["top", "best", "highest", "most", "max", "maximum", "largest", "biggest"], "high"),
+    **dict.fromkeys(["bottom", "worst", "lowest", "least", "min", "minimum", "smallest", "fewest"], "low"),
+    **dict.fromkeys(["increase", "increased", "increasing", "rise", "rising", "rose", "grow", "growing", "grew",
+                     "growth", "gain", "up", "higher", "spike"], "up"),
+    **dict.fromkeys(["decrease", "decreased", "decreasing", "drop", "dropped", "dropping", "dip", "dipped",
+                     "decline", "declined", "declining", "fall", "falling", "fell", "down", "lower"], "down"),
+    **dict.fromkeys(["not", "no", "never", "without", "except", "excluding", "n't"], "not"),
+}
+PERIOD_PATTERN = (r"\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\b"
+                  r"|\b(?:last|this|next|previous|past)\s+(?:\d+\s+)?(?:day|week|month|quarter|year)s?\b"
+                  r"|\b(?:yesterday|today|ytd|mtd|q[1-4])\b")
+TERM_PATTERN = re.compile(rf"{PERIOD_PATTERN}|n't\b|\b(?:{'|'.join(MEANING_WORDS)})\b")
+
+
+def _tokens(question):
+    words = re.findall(r"[a-z0-9_.]+", question.lower())
+    return [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words]
+
+
+def normalize_question(question):
+    return " ".join(t for t in _tokens(question) if t not in STOPWORDS)
+
+
+def _numbers(question):
+    return tuple(sorted(re.findall(r"\d+(?:\.\d+)?", question)))
+
+
+def question_terms(question, entities=()):
+    """The terms two questions must share to share an answer.
+
+    Dataset values named in the question (``entities``, e.g. products and
+    locations), periods and direction/negation words. When several values
+    are named, the order of values and directions counts too, so "aspirin
+    rising, ibuprofen falling" differs from the swapped question.
+    """
+    text = " ".join(question.lower().split())
+    found = []
+    for value in entities:
+        if m := re.search(rf"(?<!\w){re.escape(str(value).lower())}(?!\w)", text):
+            found.append((m.start(), f"={value}"))
+    named = len(found)
+    for m in TERM_PATTERN.finditer(text):
+        word = m.group(0)
+        found.append((m.start(), MEANING_WORDS.get(word, word[:3] if word.isalpha() else word)))
+    terms = tuple(sorted({term for _, term in found}))
+    if named > 1:
+        terms += ("|",) + tuple(term for _, term in sorted(found) if term in MEANING_WORDS.values() or term[0] == "=")
+    return terms
+
+
+class ResponseCache:
+    """Bounded LRU/TTL cache of agent answers for one dataset version.
+
+    Lookups match the normalized question exactly. With an ``embed``
+    function, they also fall back to the most similar cached question above
+    ``threshold`` — but only one with the same numbers (so "top 3" never
+    answers "top 5") and the same ``question_terms`` (so "north" never
+    answers "south"). Entries are kept per dataset (e.g. per tenant); a
+    dataset's entries are dropped on first use of its next version.
+    """
+
+    def __init__(self, max_entries=256, ttl=3600, threshold=0.9, embed=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.embed = embed
+        self._versions = {}  # dataset -> version its entries were computed on
+        self._entries = OrderedDict()  # (dataset, normalized question) -> entry
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def cacheable(question):
+        return not CONTEXT_WORDS.intersection(_tokens(question))
+
+    def _vector(self, question):
+        return None if self.embed is None else np.asarray(self.embed(question), dtype=float)
+
+    @staticmethod
+    def _similarity(a, b):
+        denominator = np.linalg.norm(a) * np.linalg.norm(b)
+        return float(a @ b / denominator) if denominator else 0.0
+
+    def _sync_version(self, dataset, version):
+        if dataset in self._versions and self._versions[dataset] != version:
+            for stale in [k for k in self._entries if k[0] == dataset]:
+                del self._entries[stale]
+        self._versions[dataset] = version
+
+    def get(self, question, version, entities=(), dataset=None):
+        key = (dataset, normalize_question(question))
+        now = time.time()
+        with self._lock:
+            self._sync_version(dataset, version)
+            for stale in [k for k, entry in self._entries.items() if now - entry["at"] > self.ttl]:
+                del self._entries[stale]
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return self._entries[key]["answer"]
+
+            if self.embed is None:
+                self.misses += 1
+                return None
+            vector, numbers = self._vector(question), _numbers(question)
+            terms = question_terms(question, entities)
+            best, best_score = None, self.threshold
+            for other, entry in self._entries.items():
+                if other[0] != dataset or entry["numbers"] != numbers or entry["terms"] != terms:
+                    continue
+                score = self._similarity(vector, entry["vector"])
+                if score >= best_score:
+                    best, best_score = other, score
+            if best is not None:
+                self._entries.move_to_end(best)
+                self.semantic_hits += 1
+                return self._entries[best]["answer"]
+
+            self.misses += 1
+            return None
+
+    def put(self, question, version, answer, entities=(), dataset=None):
+        key = (dataset, normalize_question(question))
+        entry = {"answer": answer, "vector": self._vector(question), "numbers": _numbers(question),
+                 "terms": question_terms(question, entities), "at": time.time()}
+        with self._lock:
+            self._sync_version(dataset, version)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": hits,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = register_cache("responses", ResponseCache())
+        return _cache
@@ -0,0 +1,407 @@
+import re
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from analytics.aggregates import get_cube
+from analytics.alerts import EXPIRY_DAYS, LOW_STOCK_THRESHOLD, REORDER_THRESHOLD, get_alert_engine, reference_date
+from analytics.caching import VersionedCache
+from data.sources import pushdown_source
+from analytics.tracing import span
+
+# Most specific first: "unit price" is not units, "units left in stock" is stock
+METRIC_WORDS = [
+    (r"unit[_ ]prices?", "Unit_Price"),
+    (r"cost[_ ]prices?", "Cost_Price"),
+    (r"inventory|stock", "Inventory_After"),
+    (r"units?_sold|units?|quantity|qty|selling|sold|sells", "Units_Sold"),
+    (r"profits?", "Profit"),
+    (r"revenue|sales|earnings?|income|turnover", "Revenue"),
+]
+DIMENSION_WORDS = [
+    (r"products?|items?|medicines?|drugs?", "Product"),
+    (r"locations?|stores?|cities|city|regions?|branch(?:es)?", "Location"),
+    (r"platforms?|channels?", "Platform"),
+]
+MONEY_METRICS = {"Revenue", "Profit", "Unit_Price", "Cost_Price"}
+# Prices are ranked and averaged, never summed
+PRICE_METRICS = {"Unit_Price", "Cost_Price"}
+NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+                "seven": 7, "eight": 8, "nine": 9, "ten": 10}
+PLURAL_DIMENSIONS = r"products|items|medicines|drugs|locations|stores|cities|regions|branches|platforms|channels"
+DEFAULT_TOP_N = 5
+
+_DATE = r"(\d{4}-\d{2}-\d{2})"
+_NUMBER = r"(\d+|" + "|".join(NUMBER_WORDS) + r")"
+_MONTHS = ("january|february|march|april|may|june|july|august|september|october|november|december"
+           "|jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec")
+# Questions the router would answer for the wrong rows: negated filters, and
+# any date or period wording left over once the supported ranges are consumed
+NEGATION = r"\b(?:not|excluding|exclude|except|without|other than)\b|n't\b"
+PERIOD_WORDS = (rf"\b(?:days?|weeks?|months?|quarters?|years?|daily|weekly|monthly|quarterly|yearly|annual"
+                rf"|yesterday|today|tonight|ytd|mtd|q[1-4]|{_MONTHS})\b|\b(?:19|20)\d{{2}}\b|\d{{4}}-\d{{2}}")
+PRICE_PHRASES = r"\b(?:unit|cost)[_ ]prices?\b"
+# Measures and orderings the router has no column for; without this "most
+# returns" or "revenue growth" would be answered as plain revenue totals
+UNMAPPED_WORDS = (r"\b(?:prices?|pricing|costs?|margins?|growth|grow(?:s|ing|n)?|grew|trends?|change[sd]?"
+                  r"|increase[sd]?|decrease[sd]?|returns?|returned|refunds?|discounts?|orders?|transactions?"
+                  r"|customers?|recent|recently|latest|newest|oldest|first|last|percent(?:age)?|share|rate|ratio)\b")
+
+
+def _number(token):
+    return NUMBER_WORDS.get(token) or int(token)
+
+
+def _search(patterns, text):
+    for pattern, value in patterns:
+        if re.search(rf"\b(?:{pattern})\b", text):
+            return value
+    return None
+
+
+@dataclass
+class Query:
+    intent: str
+    metric: str = "Revenue"
+    dimension: str = None
+    n: int = None
+    ascending: bool = False
+    how: str = "sum"
+    threshold: float = None
+    filters: dict = field(default_factory=dict)
+    start: pd.Timestamp = None
+    end: pd.Timestamp = None
+
+
+class IntentRouter:
+    """Answers common analytic questions directly from the dataframe.
+
+    ``parse`` turns a question into a ``Query`` (or None when it does not
+    match a known shape) and ``answer`` computes it with vectorized pandas.
+    Anything unrecognized is left to the LLM agent.
+    """
+
+    def __init__(self, df, today=None):
+        self.df = df
+        self._today = None if today is None else pd.Timestamp(today)
+        self.values = {}
+        # Frames of pushdown sources carry no rows; their values come from the cube
+        rows = get_cube(df).cells if df.attrs.get("dataset_lazy") else df
+        for col in ["Product", "Location", "Platform"]:
+            if col in rows.columns:
+                series = rows[col]
+                uniques = series.cat.categories if isinstance(series.dtype, pd.CategoricalDtype) else series.dropna().unique()
+                # Longest names first so "Vitamin C 500" wins over "Vitamin C"
+                self.values[col] = sorted((str(v) for v in uniques), key=len, reverse=True)
+
+    @property
+    def today(self):
+        return reference_date(self._today)
+
+    def _filters(self, text):
+        """(filters, rest): one value per column, and the text with them removed.
+
+        Filters are None when a column matches more than one value ("Aspirin
+        and Ibuprofen"); the router only answers single-value filters.
+        """
+        filters = {}
+        for col, values in self.values.items():
+            for value in values:
+                # A value named like a dimension ("Store") reads as the
+                # dimension: "which store sells most" ranks locations
+                if _search(DIMENSION_WORDS, value.lower()):
+                    continue
+                pattern = rf"(?<!\w){re.escape(value.lower())}(?!\w)"
+                if re.search(pattern, text):
+                    if col in filters:
+                        return None, text
+                    filters[col] = value
+                    # Blank it out so "Vitamin C" doesn't match inside "Vitamin C 500"
+                    text = re.sub(pattern, " ", text)
+        return filters, text
+
+    def mentions(self, question):
+        # Every dataset value the question names, for the response cache
+        text = " ".join(question.lower().split())
+        return [value for values in self.values.values() for value in values
+                if re.search(rf"(?<!\w){re.escape(value.lower())}(?!\w)", text)]
+
+    def _date_range(self, text):
+        """(start, end, rest): the date range and the text without its phrase."""
+        today = self.today
+        ranges = [
+            (rf"(?:between|from)\s+{_DATE}\s+(?:and|to)\s+{_DATE}",
+             lambda m: (pd.Timestamp(m.group(1)), pd.Timestamp(m.group(2)))),
+            (rf"(?:since|after)\s+{_DATE}", lambda m: (pd.Timestamp(m.group(1)), None)),
+            (rf"before\s+{_DATE}", lambda m: (None, pd.Timestamp(m.group(1)) - pd.Timedelta(days=1))),
+            (r"\bthis month\b", lambda m: (today.replace(day=1), today)),
+            (r"\blast month\b", lambda m: ((today.replace(day=1) - pd.Timedelta(days=1)).replace(day=1),
+                                           today.replace(day=1) - pd.Timedelta(days=1))),
+            (r"\bthis year\b", lambda m: (today.replace(month=1, day=1), today)),
+            (r"\bin\s+(\d{4})-(\d{2})\b(?!-)",
+             lambda m: (pd.Timestamp(year=int(m.group(1)), month=int(m.group(2)), day=1),
+                        pd.Timestamp(year=int(m.group(1)), month=int(m.group(2)), day=1) + pd.offsets.MonthEnd(0))),
+            (r"\bin\s+(\d{4})\b(?!-)",
+             lambda m: (pd.Timestamp(year=int(m.group(1)), month=1, day=1),
+                        pd.Timestamp(year=int(m.group(1)), month=12, day=31))),
+        ]
+        for pattern, bounds in ranges:
+            if m := re.search(pattern, text):
+                return (*bounds(m), text[:m.start()] + " " + text[m.end():])
+        return None, None, text
+
+    def parse(self, question):
+        text = " ".join(question.lower().split())
+        if re.search(NEGATION, text):
+            return None
+        filters, rest = self._filters(text)
+        if filters is None:
+            return None
+        start, end, rest = self._date_range(rest)
+        threshold = re.search(r"(?:below|under|less than|fewer than|<)\s*(\d+(?:\.\d+)?)", text)
+        threshold = float(threshold.group(1)) if threshold else None
+
+        # Alert intents always describe the current state; a date in the
+        # question asks for something else
+        dated = start is not None or end is not None
+        if re.search(r"\b(?:alerts?|warnings?|needs? attention)\b", text):
+            return None if dated or re.search(PERIOD_WORDS, rest) else Query("alerts", filters=filters)
+        if re.search(r"\bexpired\b|\bpast (?:their |its )?expiry\b", text):
+            return None if dated or re.search(PERIOD_WORDS, rest) else Query("expired", filters=filters)
+        if re.search(r"\bexpir", text):
+            days = re.search(r"(?:next|within)\s+(\d+)\s+days?", rest)
+            if days:
+                rest = rest[:days.start()] + " " + rest[days.end():]
+            if dated or re.search(PERIOD_WORDS, rest):
+                return None
+            return Query("expiry", threshold=float(days.group(1)) if days else EXPIRY_DAYS, filters=filters)
+        if re.search(r"\breorder", text):
+            if dated or re.search(PERIOD_WORDS, rest):
+                return None
+            return Query("reorder", metric="Inventory_After", dimension="Product",
+                         threshold=threshold or REORDER_THRESHOLD, filters=filters)
+        if re.search(r"\bout of (?:stock|inventory)\b|\bsold out\b", text):
+            if dated or re.search(PERIOD_WORDS, rest):
+                return None
+            return Query("out_of_stock", metric="Inventory_After", dimension="Product", filters=filters)
+        if re.search(r"\b(?:low|running out)\s+(?:on\s+|of\s+)?(?:stock|inventory)\b", text):
+            if dated or re.search(PERIOD_WORDS, rest):
+                return None
+            return Query("low_stock", metric="Inventory_After", dimension="Product",
+                         threshold=threshold or LOW_STOCK_THRESHOLD, filters=filters)
+        if re.search(PERIOD_WORDS, rest):
+            return None
+
+        metric = _search(METRIC_WORDS, rest)
+        # Stock is a running level per row, so its sums and averages mean nothing
+        if metric == "Inventory_After" or re.search(UNMAPPED_WORDS, re.sub(PRICE_PHRASES, " ", rest)):
+            return None
+
+        dimension = _search(DIMENSION_WORDS, text)
+        ranking = re.search(rf"\b(top|best|highest|most|bottom|worst|lowest|least)\b(?:\s+{_NUMBER}\b)?", text)
+        if ranking and dimension:
+            plural = re.search(rf"\b(?:{PLURAL_DIMENSIONS})\b", text)
+            n = _number(ranking.group(2)) if ranking.group(2) else (DEFAULT_TOP_N if plural else 1)
+            ascending = ranking.group(1) in ("bottom", "worst", "lowest", "least")
+            return Query("top", metric=metric or "Revenue", dimension=dimension, n=n, ascending=ascending,
+                         how="mean" if metric in PRICE_METRICS else "sum", filters=filters, start=start, end=end)
+        # Totals and averages need an explicit metric ("how many products" is not one)
+        if metric in PRICE_METRICS and not re.search(r"\b(?:average|mean|avg)\b", text):
+            return None
+        if metric and re.search(r"\b(?:total|sum of|how much|how many|overall)\b", text):
+            grouped = dimension if re.search(r"\b(?:by|per|for each|each)\b", text) else None
+            return Query("total", metric=metric, dimension=grouped, filters=filters, start=start, end=end)
+        if metric and re.search(r"\b(?:average|mean|avg)\b", text):
+            grouped = dimension if re.search(r"\b(?:by|per|for each|each)\b", text) else None
+            return Query("average", metric=metric, dimension=grouped, filters=filters, start=start, end=end)
+        return None
+
+    def _rows(self, query, columns):
+        df = self.df
+        mask = pd.Series(True, index=df.index)
+        for col, value in query.filters.items():
+            mask &= df[col] == value
+        if (query.start is not None or query.end is not None) and "Date" in df.columns:
+            if query.start is not None:
+                mask &= df["Date"] >= query.start
+            if query.end is not None:
+                mask &= df["Date"] < query.end + pd.Timedelta(days=1)
+        return df.loc[mask, [col for col in columns if col in df.columns]]
+
+    def _aggregate(self, query, how="sum"):
+        # Pushed down to the dataset's engine when it has one, else pandas
+        by = query.dimension
+        source = pushdown_source(self.df)
+        if source is not None:
+            return source.aggregate(query.metric, by=by, filters=query.filters, start=query.start, end=query.end, how=how)
+        rows = self._rows(query, [query.metric, by] if by else [query.metric])
+        return rows.groupby(by, observed=True)[query.metric].agg(how) if by else rows[query.metric].agg(how)
+
+    def _scope(self, query):
+        parts = [f"{col} = {value}" for col, value in query.filters.items()]
+        if query.start is not None or query.end is not None:
+            start = query.start.date() if query.start is not None else "the beginning"
+            end = query.end.date() if query.end is not None else "the latest sale"
+            parts.append(f"from {start} to {end}")
+        return f" ({', '.join(parts)})" if parts else ""
+
+    def answer(self, question):
+        # Anything the router can't parse or compute (impossible dates,
+        # out-of-range windows) is left to the agent rather than shown as an error
+        try:
+            query = self.parse(question)
+            if query is None:
+                return None
+            needed = [query.metric, query.dimension, *query.filters]
+            if any(col and col not in self.df.columns for col in needed):
+                return None
+            return getattr(self, f"_answer_{query.intent}")(query)
+        except (ValueError, OverflowError, KeyError):
+            return None
+
+    def _answer_top(self, query):
+        totals = self._aggregate(query, query.how)
+        ranked = totals.sort_values(ascending=query.ascending).head(query.n)
+        if ranked.empty:
+            return f"No {query.metric} data found{self._scope(query)}."
+        label = "Bottom" if query.ascending else "Top"
+        word = "total" if query.how == "sum" else "average"
+        lines = [f"{label} {len(ranked)} {query.dimension} by {word} {query.metric}{self._scope(query)}:"]
+        lines += [f"{i}. {name}: {_format(query.metric, value)}" for i, (name, value) in enumerate(ranked.items(), 1)]
+        return "\n".join(lines)
+
+    def _answer_total(self, query, how="sum"):
+        values = self._aggregate(query, how)
+        word = "Total" if how == "sum" else "Average"
+        if query.dimension:
+            values = values.sort_values(ascending=False)
+            lines = [f"{word} {query.metric} by {query.dimension}{self._scope(query)}:"]
+            lines += [f"- {name}: {_format(query.metric, value)}" for name, value in values.items()]
+            return "\n".join(lines)
+        return f"{word} {query.metric}{self._scope(query)}: {_format(query.metric, values)}"
+
+    def _answer_average(self, query):
+        return self._answer_total(query, how="mean")
+
+    def _alerts(self, query, **thresholds):
+        # Latest stock and expiry batches come from the shared alert engine;
+        # it only knows products and locations, so other filters go to the agent
+        if set(query.filters) - {"Product", "Location"}:
+            return None
+        products = [query.filters["Product"]] if "Product" in query.filters else None
+        locations = [query.filters["Location"]] if "Location" in query.filters else None
+        return get_alert_engine(self.df).evaluate(self.today, products=products, locations=locations, **thresholds)
+
+    def _answer_alerts(self, query):
+        alerts = self._alerts(query)
+        return None if alerts is None else alerts.summary()
+
+    def _answer_low_stock(self, query, kind="low_stock"):
+        alerts = self._alerts(query, **{kind: query.threshold})
+        if alerts is None:
+            return None
+        rows = getattr(alerts, kind)
+        title = f"{'to reorder' if kind == 'reorder' else 'with inventory'} below {query.threshold:g}"
+        if rows.empty:
+            return f"No products {title}{self._scope(query)}."
+        lines = [f"Products {title}{self._scope(query)}:"]
+        lines += [f"- {row.Product} ({row.Location}): {row.Inventory_After:,.0f} left"
+                  for row in rows.itertuples(index=False)]
+        return "\n".join(lines)
+
+    def _answer_reorder(self, query):
+        return self._answer_low_stock(query, kind="reorder")
+
+    def _answer_out_of_stock(self, query):
+        alerts = self._alerts(query)
+        if alerts is None:
+            return None
+        rows = alerts.low_stock[alerts.low_stock["Inventory_After"] <= 0]
+        if rows.empty:
+            return f"No products out of stock{self._scope(query)}."
+        lines = [f"Products out of stock{self._scope(query)}:"]
+        lines += [f"- {row.Product} ({row.Location})" for row in rows.itertuples(index=False)]
+        return "\n".join(lines)
+
+    def _answer_expiry(self, query):
+        if "Expiry Date" not in self.df.columns:
+            return None
+        alerts = self._alerts(query, expiry_days=query.threshold)
+        if alerts is None:
+            return None
+        soon = alerts.expiring.groupby("Product", observed=True)["Expiry Date"].min().sort_values()
+        if soon.empty:
+            return f"No products expiring in the next {query.threshold:g} days{self._scope(query)}."
+        lines = [f"Products expiring in the next {query.threshold:g} days{self._scope(query)}:"]
+        lines += [f"- {name}: {date.date()}" for name, date in soon.items()]
+        return "\n".join(lines)
+
+    def _answer_expired(self, query):
+        if "Expiry Date" not in self.df.columns:
+            return None
+        alerts = self._alerts(query)
+        if alerts is None:
+            return None
+        expired = alerts.expired.groupby("Product", observed=True)["Expiry Date"].max().sort_values()
+        if expired.empty:
+            return f"No products past their expiry date as of {alerts.reference_date.date()}{self._scope(query)}."
+        lines = [f"Products past their expiry date as of {alerts.reference_date.date()}{self._scope(query)}:"]
+        lines += [f"- {name}: expired {date.date()}" for name, date in expired.items()]
+        return "\n".join(lines)
+
+
+def _format(metric, value):
+    if pd.isna(value):
+        return "N/A"
+    return f"${value:,.2f}" if metric in MONEY_METRICS else f"{value:,.0f}"
+
+
+_routers = VersionedCache(max_entries=8, name="routers")
+
+
+def get_router(df):
+    return _routers.get_or_compute(df.attrs.get("dataset_version"), lambda: IntentRouter(df))
+
+
+def lookup_answer(question, df=None, cache=None):
+    # Deterministic fast path first, then previously cached agent answers
+    if df is not None:
+        answer = get_router(df).answer(question)
+        if answer is not None:
+            return answer
+    if cache is not None and cache.cacheable(question):
+        return cache.get(question, *_cache_scope(question, df))
+    return None
+
+
+def _cache_scope(question, df):
+    # (version, entities, dataset): cached answers are kept per dataset/tenant
+    if df is None:
+        return None, (), None
+    return df.attrs.get("dataset_version"), get_router(df).mentions(question), df.attrs.get("dataset_name")
+
+
+def remember_answer(question, answer, df=None, cache=None):
+    if cache is not None and cache.cacheable(question):
+        version, entities, dataset = _cache_scope(question, df)
+        cache.put(question, version, answer, entities, dataset)
+
+
+def remember_turn(agent, question, answer):
+    # Router and cached answers never pass through the agent executor, so they
+    # are saved to its memory here; otherwise "why is that?" has no context
+    memory = getattr(agent, "memory", None)
+    if memory is not None:
+        memory.save_context({"input": question}, {"output": answer})
+
+
+def answer_question(question, agent, df=None, cache=None):
+    # The LLM agent only sees what the router and cache can't answer
+    answer = lookup_answer(question, df, cache)
+    if answer is None:
+        with span("agent.run"):
+            answer = agent.run(question)
+        remember_answer(question, answer, df, cache)
+    else:
+        remember_turn(agent, question, answer)
+    return answer
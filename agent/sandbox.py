@@ -0,0 +1,287 @@
+import atexit
+import glob
+import json
+import os
+import queue
+import re
+import select
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Type
+
+from langchain_core.pydantic_v1 import BaseModel, Field
+from langchain_core.tools import BaseTool
+
+from analytics.caching import register_cache
+from data.cache import cache_path, default_cache_dir, write_cache
+from data.sources import load_rows
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SANDBOX_ENABLED = os.getenv("BIZBUDDY_SANDBOX", "1") == "1"
+SANDBOX_WORKERS = int(os.getenv("BIZBUDDY_SANDBOX_WORKERS", "2"))
+SANDBOX_TIMEOUT = float(os.getenv("BIZBUDDY_SANDBOX_TIMEOUT", "30"))
+SANDBOX_CPU_SECONDS = int(os.getenv("BIZBUDDY_SANDBOX_CPU_SECONDS", "20"))
+SANDBOX_MEMORY_MB = int(os.getenv("BIZBUDDY_SANDBOX_MEMORY_MB", "2048"))
+# Worker pools kept warm at once (one per dataset version, e.g. per tenant)
+SANDBOX_POOLS = int(os.getenv("BIZBUDDY_SANDBOX_POOLS", "2"))
+# The only environment variables generated code can see, so API keys set in
+# the app's environment don't reach the worker. This is not filesystem
+# isolation: workers run in an empty directory, so relative paths such as
+# ".env" don't resolve to the app's files, but absolute paths still do
+SANDBOX_ENV = ["PATH", "LANG", "LANGUAGE"]
+
+
+def _worker_env():
+    env = {key: os.environ[key] for key in SANDBOX_ENV if key in os.environ}
+    env.update({key: value for key, value in os.environ.items() if key.startswith("LC_")})
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, os.getenv("PYTHONPATH")]))
+    return env
+
+
+class _Worker:
+    def __init__(self, path, memory_mb, start_timeout):
+        self.cwd = tempfile.mkdtemp(prefix="bizbuddy-sandbox-")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "agent.sandbox_worker", path, str(memory_mb)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, cwd=self.cwd, env=_worker_env(),
+        )
+        if self.read(start_timeout) is None:
+            self.kill()
+            raise RuntimeError("Sandbox worker failed to start")
+
+    def read(self, timeout):
+        ready, _, _ = select.select([self.process.stdout], [], [], timeout)
+        if not ready:
+            return None
+        line = self.process.stdout.readline()
+        return json.loads(line) if line else None
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def kill(self):
+        if self.alive():
+            self.process.kill()
+        self.process.wait()
+        shutil.rmtree(self.cwd, ignore_errors=True)
+
+
+class SandboxPool:
+    """Pre-warmed worker processes that run agent-generated pandas code.
+
+    Every worker memory-maps the same Arrow file, so the dataset pages are
+    shared between them. A snippet runs with a CPU-time budget, a memory cap
+    and a wall-clock timeout; a worker that blows one of them is killed and
+    replaced, and the Streamlit process itself is never blocked or crashed.
+    With ``owns_file`` the Arrow file is deleted when the pool is closed.
+    """
+
+    def __init__(self, path, workers=SANDBOX_WORKERS, timeout=SANDBOX_TIMEOUT,
+                 cpu_seconds=SANDBOX_CPU_SECONDS, memory_mb=SANDBOX_MEMORY_MB, start_timeout=60,
+                 owns_file=False):
+        self.path = path
+        self.owns_file = owns_file
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.start_timeout = start_timeout
+        self._idle = queue.Queue()
+        self._closed = False
+        for _ in range(workers):
+            self._idle.put(self._spawn())
+
+    def _spawn(self):
+        return _Worker(self.path, self.memory_mb, self.start_timeout)
+
+    def run(self, code):
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            return f"TimeoutError: no sandbox worker became free within {self.timeout:g} seconds"
+        try:
+            worker.process.stdin.write(json.dumps({"code": code, "cpu_seconds": self.cpu_seconds}) + "\n")
+            worker.process.stdin.flush()
+            response = worker.read(self.timeout)
+        except (BrokenPipeError, OSError, ValueError):
+            response = None
+
+        if response is not None:
+            if self._closed:
+                worker.kill()
+            else:
+                self._idle.put(worker)
+            return response["output"]
+
+        timed_out = worker.alive()
+        worker.kill()
+        if not self._closed:
+            self._idle.put(self._spawn())
+        if timed_out:
+            return f"TimeoutError: code did not finish within {self.timeout:g} seconds"
+        return "ResourceError: code exceeded the sandbox CPU or memory limit"
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                break
+        if self.owns_file:
+            # Busy workers keep their mapping until they finish and are killed
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+# Added to the agent's system prompt when its tool is sandboxed
+STATELESS_PROMPT = ("Every python_repl_ast call starts fresh with only `df`, `pd` and `np` defined: "
+                    "do not rely on variables from an earlier call.")
+
+
+class _PythonInput(BaseModel):
+    query: str = Field(description="code snippet to run")
+
+
+class SandboxedPythonTool(BaseTool):
+    # Same name and input as PythonAstREPLTool, but each call runs in a fresh
+    # namespace on whichever worker is free, so the description says so
+    name: str = "python_repl_ast"
+    description: str = (
+        "Runs a Python snippet against the dataframe `df` (pandas is `pd`, numpy is `np`). "
+        "Each call starts from a fresh namespace: variables defined in earlier calls no longer exist, "
+        "so compute everything a result needs in one snippet. "
+        "The value of the last line, or what the snippet prints, is returned. "
+        "When using this tool, sometimes output is abbreviated - "
+        "make sure it does not look abbreviated before using it in your answer."
+    )
+    args_schema: Type[BaseModel] = _PythonInput
+    # Either a fixed pool, or the frame whose (shared, LRU-managed) pool to use
+    pool: SandboxPool = None
+    frame: Any = Field(default=None, repr=False)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _run(self, query, run_manager=None):
+        # Models often wrap code in markdown fences
+        query = re.sub(r"^(\s|`)*(?i:python)?\s*", "", query)
+        query = re.sub(r"(\s|`)*$", "", query)
+        pool = self.pool if self.pool is not None else get_sandbox(self.frame)
+        return pool.run(query)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _sweep_sandbox_files(cache_dir):
+    # Files left behind by processes that exited without closing their pools
+    for path in glob.glob(os.path.join(cache_dir, "sandbox-*.arrow")):
+        owner = re.match(r"sandbox-(\d+)-", os.path.basename(path))
+        if owner and _pid_alive(int(owner.group(1))):
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class _SandboxPools:
+    """One pool per dataset version, least recently used closed beyond
+    SANDBOX_POOLS. Registered as a named cache, so evicting a data version
+    (e.g. a tenant's) closes its pool and deletes its copy of the frame."""
+
+    def __init__(self):
+        self._pools = OrderedDict()
+        self._lock = threading.Lock()
+        self._swept = False
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, df):
+        version = df.attrs.get("dataset_version")
+        key = version if version is not None else ("frame", id(df))
+        evicted = []
+        with self._lock:
+            if key in self._pools:
+                self._pools.move_to_end(key)
+                self.hits += 1
+                return self._pools[key]
+            self.misses += 1
+            cache_dir = default_cache_dir()
+            if not self._swept:
+                _sweep_sandbox_files(cache_dir)
+                self._swept = True
+            name = f"sandbox-{os.getpid()}-{version if version is not None else f'frame-{id(df)}'}"
+            write_cache(cache_dir, name, load_rows(df), {"version": version})
+            try:
+                self._pools[key] = SandboxPool(cache_path(cache_dir, name), owns_file=True)
+            except Exception:
+                os.remove(cache_path(cache_dir, name))
+                raise
+            while len(self._pools) > max(SANDBOX_POOLS, 1):
+                evicted.append(self._pools.popitem(last=False)[1])
+            pool = self._pools[key]
+        for previous in evicted:
+            previous.close()
+        return pool
+
+    def discard(self, version):
+        with self._lock:
+            pool = self._pools.pop(version, None)
+        if pool is not None:
+            pool.close()
+
+    def close(self):
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._pools),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_sandboxes = register_cache("sandboxes", _SandboxPools())
+
+
+def get_sandbox(df):
+    return _sandboxes.get(df)
+
+
+def close_sandboxes():
+    _sandboxes.close()
+
+
+def make_python_tool(df):
+    if SANDBOX_ENABLED:
+        if not df.attrs.get("dataset_lazy"):
+            get_sandbox(df)  # warm the workers now rather than on the first question
+        # Pushdown sources' rows are only read when the first snippet runs
+        return SandboxedPythonTool(frame=df)
+    from langchain_experimental.tools.python.tool import PythonAstREPLTool
+    return PythonAstREPLTool(locals={"df": load_rows(df)})
+
+
+atexit.register(close_sandboxes)
@@ -0,0 +1,77 @@
+"""Worker process for agent/sandbox.py.
+
+Loads the dataset from a memory-mapped Arrow file once, then executes one
+snippet of generated pandas code per JSON request line on stdin. Limits are
+applied with setrlimit: RLIMIT_DATA for memory once at startup, RLIMIT_CPU
+re-armed before every snippet so each one gets its own CPU budget.
+"""
+import ast
+import io
+import json
+import os
+import sys
+from contextlib import redirect_stdout
+
+try:
+    import resource
+except ImportError:  # not available on Windows; limits are skipped there
+    resource = None
+
+
+def run_code(code, namespace):
+    # Same semantics as langchain's PythonAstREPLTool: exec everything but the
+    # last statement, then eval it (falling back to exec) and return its value
+    # or whatever was printed
+    try:
+        tree = ast.parse(code)
+        exec(ast.unparse(ast.Module(tree.body[:-1], type_ignores=[])), namespace)
+        last = ast.unparse(ast.Module(tree.body[-1:], type_ignores=[]))
+        buffer = io.StringIO()
+        try:
+            with redirect_stdout(buffer):
+                result = eval(last, namespace)
+            return buffer.getvalue() if result is None else str(result)
+        except Exception:
+            with redirect_stdout(buffer):
+                exec(last, namespace)
+            return buffer.getvalue()
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def _arm_cpu_limit(seconds):
+    if resource is None or not seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime) + 1
+    resource.setrlimit(resource.RLIMIT_CPU, (used + int(seconds), resource.RLIM_INFINITY))
+
+
+def main(path, memory_mb):
+    # Keep the protocol on a private fd so generated code printing to the real
+    # stdout can't corrupt it
+    protocol = os.fdopen(os.dup(1), "w", buffering=1)
+    os.dup2(2, 1)
+
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+
+    pd.set_option("mode.copy_on_write", True)
+    df = pa.ipc.open_file(pa.memory_map(path, "r")).read_all().to_pandas(split_blocks=True)
+    if resource is not None and memory_mb:
+        limit = int(memory_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_DATA, (limit, limit))
+    protocol.write(json.dumps({"ready": True}) + "\n")
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        _arm_cpu_limit(request.get("cpu_seconds"))
+        # Fresh namespace per snippet; the dataframe itself is shared copy-on-write
+        namespace = {"df": df.copy(deep=False), "pd": pd, "np": np}
+        output = run_code(request["code"], namespace)
+        protocol.write(json.dumps({"output": output}) + "\n")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], int(sys.argv[2]))
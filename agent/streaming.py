@@ -0,0 +1,74 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+
+from agent.memory import memory_callbacks
+
+DEFAULT_TIMEOUT = float(os.getenv("BIZBUDDY_AGENT_TIMEOUT", "60"))
+
+_DONE = object()
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _event_loop():
+    # One background loop per process runs every streaming agent call, so the
+    # Streamlit script thread only ever reads from a queue
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="agent-stream-loop", daemon=True).start()
+        return _loop
+
+
+async def _produce(agent, question, events, callbacks):
+    try:
+        config = {"callbacks": callbacks} if callbacks else None
+        with memory_callbacks(getattr(agent, "memory", None), callbacks):
+            async for event in agent.astream_events({"input": question}, config=config, version="v2"):
+                kind = event["event"]
+                if kind == "on_chat_model_stream":
+                    text = event["data"]["chunk"].content
+                    if text:
+                        events.put(("token", text))
+                elif kind == "on_tool_start":
+                    events.put(("tool", event["name"], event["data"].get("input")))
+                elif kind == "on_tool_end":
+                    events.put(("tool_end", event["name"], event["data"].get("output")))
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    output = event["data"].get("output")
+                    events.put(("final", output.get("output") if isinstance(output, dict) else output))
+    finally:
+        events.put(_DONE)
+
+
+def stream_agent(agent, question, timeout=DEFAULT_TIMEOUT, callbacks=None):
+    """Yield ("token", text), ("tool", name, input), ("tool_end", name, output)
+    and finally ("final", answer) while the agent runs.
+
+    Raises TimeoutError once ``timeout`` seconds have passed. Whenever the
+    consumer stops early (timeout, error, or Streamlit abandoning the rerun)
+    the agent task is cancelled, which closes the model stream.
+    """
+    events = queue.Queue()
+    future = asyncio.run_coroutine_threadsafe(_produce(agent, question, events, callbacks), _event_loop())
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"The agent did not finish within {timeout:g} seconds")
+            try:
+                item = events.get(timeout=min(remaining, 0.1))
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                # Surfaces any exception raised inside the agent
+                future.result()
+                return
+            yield item
+    finally:
+        future.cancel()
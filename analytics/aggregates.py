@@ -0,0 +1,99 @@
+import pandas as pd
+
+from analytics.caching import VersionedCache
+from data.sources import pushdown_source
+
+CUBE_DIMENSIONS = ["Product", "Location", "Platform", "Month"]
+SUM_COLUMNS = ["Revenue", "Units_Sold", "Inventory_After", "Profit"]
+MIN_COLUMNS = ["Inventory_After"]
+MAX_CACHED_CUBES = 8
+
+
+class AggregateCube:
+    """Product x Location x Platform x Month sums, counts and mins.
+
+    Built with a single groupby over the raw rows; every dashboard panel is
+    answered by re-grouping the (much smaller) cube instead of the frame.
+    """
+
+    def __init__(self, cells, dimensions, rows):
+        self.cells = cells
+        self.dimensions = dimensions
+        self.rows = rows
+
+    @classmethod
+    def build(cls, df):
+        keys = {dim: df[dim] for dim in CUBE_DIMENSIONS[:-1] if dim in df.columns}
+        if "Date" in df.columns:
+            keys["Month"] = pd.to_datetime(df["Date"], errors="coerce").dt.to_period("M")
+        dimensions = list(keys)
+
+        aggregations = {"rows": ("_row", "size")}
+        for col in SUM_COLUMNS:
+            if col in df.columns:
+                aggregations[f"{col}_sum"] = (col, "sum")
+                aggregations[f"{col}_count"] = (col, "count")
+        for col in MIN_COLUMNS:
+            if col in df.columns:
+                aggregations[f"{col}_min"] = (col, "min")
+
+        values = [col for col in dict.fromkeys(SUM_COLUMNS + MIN_COLUMNS) if col in df.columns]
+        frame = pd.DataFrame({col: df[col] for col in values}, index=df.index)
+        frame["_row"] = 0
+        frame = frame.assign(**{f"_key_{dim}": key for dim, key in keys.items()})
+        by = [f"_key_{dim}" for dim in dimensions]
+        cells = frame.groupby(by, observed=True, dropna=False, sort=False).agg(**aggregations)
+        cells.index.names = dimensions
+        return cls(cells.reset_index(), dimensions, len(df))
+
+    @classmethod
+    def from_source(cls, source):
+        # Same cells, computed by the source's engine instead of from loaded rows
+        cells = source.aggregate_cells(CUBE_DIMENSIONS, SUM_COLUMNS, MIN_COLUMNS)
+        dimensions = [dim for dim in CUBE_DIMENSIONS if dim in cells.columns]
+        if "Month" in cells.columns:
+            cells["Month"] = pd.PeriodIndex(cells["Month"], freq="M")
+        return cls(cells, dimensions, int(cells["rows"].sum()))
+
+    def has(self, dimension):
+        return dimension in self.dimensions
+
+    def total(self, metric):
+        return self.cells[f"{metric}_sum"].sum()
+
+    def by(self, dimension, metric="Revenue", how="sum"):
+        grouped = self.cells.groupby(dimension, observed=True)
+        if how == "sum":
+            result = grouped[f"{metric}_sum"].sum()
+        elif how == "min":
+            result = grouped[f"{metric}_min"].min()
+        elif how == "mean":
+            result = grouped[f"{metric}_sum"].sum() / grouped[f"{metric}_count"].sum()
+        elif how == "count":
+            result = grouped["rows"].sum()
+        else:
+            raise ValueError(f"Unsupported aggregation: {how}")
+        return result.rename(metric)
+
+    def monthly(self, metric="Revenue"):
+        # Same shape as df.groupby(pd.Grouper(key="Date", freq="M")): every
+        # month between the first and last sale, labelled by month end
+        series = self.by("Month", metric)
+        if series.empty:
+            return series.rename_axis("Month")
+        months = pd.period_range(series.index.min(), series.index.max(), freq="M")
+        series = series.reindex(months, fill_value=0)
+        series.index = series.index.to_timestamp(how="end").normalize()
+        return series.rename_axis("Month")
+
+
+_cubes = VersionedCache(MAX_CACHED_CUBES, name="cubes")
+
+
+def get_cube(df):
+    # One cube per dataset version; frames without a version are built uncached
+    def build():
+        source = pushdown_source(df)
+        return AggregateCube.from_source(source) if source is not None else AggregateCube.build(df)
+
+    return _cubes.get_or_compute(df.attrs.get("dataset_version"), build)
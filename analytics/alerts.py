@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from analytics.caching import VersionedCache
+from data.frame import prepare_frame
+from data.sources import pushdown_source
+
+LOW_STOCK_THRESHOLD = 20
+REORDER_THRESHOLD = 30
+EXPIRY_DAYS = 60
+EXPIRY_RISK_DAYS = 90
+
+STOCK_COLUMNS = ["Product", "Location", "Inventory_After", "Date"]
+EXPIRY_COLUMNS = ["Product", "Location", "Expiry Date", "Inventory_After"]
+
+
+def reference_date(value=None):
+    # Explicit value, then BIZBUDDY_REFERENCE_DATE (e.g. to replay a historical
+    # snapshot), then the clock
+    value = value if value is not None else os.getenv("BIZBUDDY_REFERENCE_DATE")
+    return pd.Timestamp(value).normalize() if value else pd.Timestamp.today().normalize()
+
+
+@dataclass
+class Alerts:
+    reference_date: pd.Timestamp
+    low_stock: pd.DataFrame
+    reorder: pd.DataFrame
+    expired: pd.DataFrame
+    expiring: pd.DataFrame
+    expiry_risk: pd.DataFrame
+
+    KINDS = ("low_stock", "reorder", "expired", "expiring", "expiry_risk")
+
+    def counts(self):
+        return {kind: len(getattr(self, kind)) for kind in self.KINDS}
+
+    def to_dict(self):
+        return {
+            "reference_date": self.reference_date.date().isoformat(),
+            **{kind: json.loads(getattr(self, kind).to_json(orient="records", date_format="iso")) for kind in self.KINDS},
+        }
+
+    def summary(self, limit=5):
+        lines = [f"Alerts as of {self.reference_date.date()}:"]
+        sections = [
+            ("low_stock", "Low stock", lambda r: f"{r['Inventory_After']:,.0f} left"),
+            ("expired", "Past expiry, location still reports stock", lambda r: f"expired {r['Expiry Date'].date()}"),
+            ("expiring", "Expiring soon", lambda r: f"expires {r['Expiry Date'].date()}"),
+        ]
+        for kind, title, describe in sections:
+            frame = getattr(self, kind)
+            if frame.empty:
+                continue
+            lines.append(f"{title} ({len(frame)}):")
+            lines += [f"- {r['Product']} ({r['Location']}): {describe(r)}" for _, r in frame.head(limit).iterrows()]
+            if len(frame) > limit:
+                lines.append(f"- ... and {len(frame) - limit} more")
+        return "\n".join(lines) if len(lines) > 1 else f"No alerts as of {self.reference_date.date()}."
+
+
+class AlertEngine:
+    """Inventory and expiry alerts from two small sorted indexes.
+
+    Built once per dataset version: the latest stock level per
+    product/location sorted by quantity, and every product/location/expiry
+    batch sorted by expiry date. Evaluating all thresholds is then a handful
+    of binary searches plus slicing, however long the sales history is.
+
+    The data has no per-batch stock, only each product/location's level after
+    a sale, so ``expired`` lists past-expiry batches whose product/location
+    still reported stock on its last sale of that batch, most recent first.
+    That flags batches to check on the shelf, not confirmed expired stock.
+    """
+
+    def __init__(self, latest, batches=None):
+        # latest: the last row per product/location; batches: the last row per
+        # product/location/expiry date (the most recent sale carries its stock)
+        latest = latest.dropna(subset=["Inventory_After"])
+        self.stock = latest.sort_values("Inventory_After", kind="stable").reset_index(drop=True)
+        self._stock_values = self.stock["Inventory_After"].to_numpy()
+
+        if batches is not None:
+            self.expiries = batches.sort_values("Expiry Date", kind="stable").reset_index(drop=True)
+        else:
+            self.expiries = pd.DataFrame(columns=EXPIRY_COLUMNS)
+        self._expiry_values = self.expiries["Expiry Date"].to_numpy(dtype="datetime64[ns]")
+
+    @classmethod
+    def build(cls, df):
+        keys = [col for col in ["Product", "Location"] if col in df.columns]
+        ordered = df.sort_values("Date", kind="stable") if "Date" in df.columns else df
+        latest = ordered[[col for col in STOCK_COLUMNS if col in df.columns]].drop_duplicates(keys, keep="last")
+        batches = None
+        if "Expiry Date" in df.columns:
+            batches = ordered[[col for col in EXPIRY_COLUMNS if col in df.columns]].dropna(subset=["Expiry Date"])
+            batches = batches.drop_duplicates(keys + ["Expiry Date"], keep="last")
+        return cls(latest, batches)
+
+    @classmethod
+    def from_source(cls, source):
+        # Same latest rows, picked by the source's engine instead of from loaded rows
+        names = source.columns()
+        keys = [col for col in ["Product", "Location"] if col in names]
+        latest = prepare_frame(source.latest(keys, [col for col in STOCK_COLUMNS if col in names]))
+        batches = None
+        if "Expiry Date" in names:
+            columns = [col for col in EXPIRY_COLUMNS if col in names]
+            batches = prepare_frame(source.latest(keys + ["Expiry Date"], columns, not_null=["Expiry Date"]))
+        return cls(latest, batches)
+
+    def evaluate(self, reference=None, low_stock=LOW_STOCK_THRESHOLD, reorder=REORDER_THRESHOLD,
+                 expiry_days=EXPIRY_DAYS, risk_days=EXPIRY_RISK_DAYS, products=None, locations=None):
+        today = reference_date(reference)
+        low_end, reorder_end = np.searchsorted(self._stock_values, [low_stock, reorder], side="left")
+        horizons = np.array([today + pd.Timedelta(days=expiry_days), today + pd.Timedelta(days=risk_days)],
+                            dtype="datetime64[ns]")
+        start = np.searchsorted(self._expiry_values, np.datetime64(today, "ns"), side="left")
+        soon_end, risk_end = np.searchsorted(self._expiry_values, horizons, side="right")
+
+        def select(frame, lo, hi):
+            rows = frame.iloc[lo:hi]
+            if products:
+                rows = rows[rows["Product"].isin(products)]
+            if locations:
+                rows = rows[rows["Location"].isin(locations)]
+            return rows.reset_index(drop=True)
+
+        expired = select(self.expiries, 0, start).iloc[::-1]
+        return Alerts(
+            reference_date=today,
+            low_stock=select(self.stock, 0, low_end),
+            reorder=select(self.stock, 0, reorder_end),
+            expired=expired[expired["Inventory_After"] > 0].reset_index(drop=True),
+            expiring=select(self.expiries, start, soon_end),
+            expiry_risk=select(self.expiries, start, risk_end),
+        )
+
+
+_engines = VersionedCache(max_entries=8, name="alert_engines")
+
+
+def get_alert_engine(df):
+    def build():
+        source = pushdown_source(df)
+        return AlertEngine.from_source(source) if source is not None else AlertEngine.build(df)
+
+    return _engines.get_or_compute(df.attrs.get("dataset_version"), build)
+
+
+def run_alert_job(df, path=None, reference=None):
+    # Entry point for cron or the background scheduler: evaluate every alert
+    # and publish them as JSON for anything that wants to notify on them
+    alerts = get_alert_engine(df).evaluate(reference)
+    if path:
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump({"dataset_version": df.attrs.get("dataset_version"), **alerts.to_dict()}, f, indent=2)
+        os.replace(tmp_path, path)
+    return alerts
+
+
+def main(argv=None):
+    from data.store import DEFAULT_DATASET, load_dataset
+
+    parser = argparse.ArgumentParser(description="Evaluate inventory and expiry alerts.")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET, help="dataset name")
+    parser.add_argument("--out", help="write the alerts to this JSON file")
+    parser.add_argument("--date", help="reference date (default: BIZBUDDY_REFERENCE_DATE or today)")
+    args = parser.parse_args(argv)
+
+    alerts = run_alert_job(load_dataset(args.dataset).view(), args.out, args.date)
+    print(alerts.summary())
+
+
+if __name__ == "__main__":
+    main()
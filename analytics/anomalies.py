@@ -0,0 +1,147 @@
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+from analytics.caching import VersionedCache, register_cache
+from data.sources import load_rows
+
+FEATURE_COLUMNS = ["Revenue", "Units_Sold", "Inventory_After"]
+DEFAULT_RETRAIN_INTERVAL = 24 * 3600
+
+
+@dataclass
+class _ModelState:
+    model: object
+    # Side table: feature-row hash -> IsolationForest label (-1 anomaly, 1 normal)
+    table: pd.Series
+    fitted_at: float
+
+
+class AnomalyService:
+    """Keeps one fitted IsolationForest per dataset and scores only new rows.
+
+    Rows are identified by a hash of their feature values, so a new dataset
+    version only pays for rows the model has not labelled yet. The model is
+    refitted when it is older than ``retrain_interval`` seconds or when a
+    batch of new rows is flagged at ``drift_factor`` times the expected rate.
+    """
+
+    def __init__(self, contamination=0.1, retrain_interval=DEFAULT_RETRAIN_INTERVAL,
+                 drift_factor=2.0, min_batch=50, cache_dir=None, cache_name=None):
+        self.contamination = contamination
+        self.retrain_interval = retrain_interval
+        self.drift_factor = drift_factor
+        self.min_batch = min_batch
+        self.cache_dir = cache_dir
+        self._states = {}
+        self._lock = threading.Lock()
+        self._results = VersionedCache(max_entries=8)
+        self.fit_count = 0
+        self.scored_rows = 0
+        if cache_name:
+            register_cache(cache_name, self)
+
+    def flags(self, df):
+        name = df.attrs.get("dataset_name", "default")
+        version = df.attrs.get("dataset_version")
+        key = None if version is None else (version, name)
+        return self._results.get_or_compute(key, lambda: self._update(name, df))
+
+    def discard(self, version):
+        self._results.discard(version)
+
+    def forget(self, name):
+        # The persisted model stays on disk, so the dataset comes back unrefitted
+        with self._lock:
+            self._states.pop(name, None)
+
+    def stats(self):
+        return self._results.stats()
+
+    def _update(self, name, df):
+        features = load_rows(df, FEATURE_COLUMNS).dropna()
+        hashes = pd.util.hash_pandas_object(features, index=False).to_numpy()
+        with self._lock:
+            state = self._states.get(name) or self._load(name)
+            if state is None or time.time() - state.fitted_at > self.retrain_interval:
+                state = self._fit(name, features, hashes)
+            else:
+                new = state.table.index.get_indexer(hashes) < 0
+                if new.any():
+                    labels = state.model.predict(features[new])
+                    self.scored_rows += int(new.sum())
+                    drifted = new.sum() >= self.min_batch and (labels == -1).mean() > self.contamination * self.drift_factor
+                    if drifted:
+                        state = self._fit(name, features, hashes)
+                    else:
+                        added = pd.Series(labels, index=hashes[new])
+                        state.table = pd.concat([state.table, added[~added.index.duplicated()]])
+                        self._save(name, state)
+            labels = state.table.reindex(hashes).to_numpy()
+        return pd.Series(labels, index=features.index, name="Anomaly")
+
+    def _fit(self, name, features, hashes):
+        # scikit-learn is imported on first use so page loads never pay for it
+        from sklearn.ensemble import IsolationForest
+
+        model = IsolationForest(contamination=self.contamination, random_state=42)
+        labels = model.fit(features).predict(features)
+        self.fit_count += 1
+        self.scored_rows += len(features)
+        table = pd.Series(labels, index=hashes)
+        state = _ModelState(model=model, table=table[~table.index.duplicated()], fitted_at=time.time())
+        self._states[name] = state
+        self._save(name, state)
+        return state
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.anomalies.joblib")
+
+    def _load(self, name):
+        if not self.cache_dir or not os.path.exists(self._path(name)):
+            return None
+        import joblib
+        try:
+            state = _ModelState(**joblib.load(self._path(name)))
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable anomaly model for {name}: {e}")
+            return None
+        self._states[name] = state
+        return state
+
+    def _save(self, name, state):
+        if not self.cache_dir:
+            return
+        import joblib
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            joblib.dump({"model": state.model, "table": state.table, "fitted_at": state.fitted_at}, tmp_path)
+            os.replace(tmp_path, self._path(name))
+        except Exception as e:
+            print(f"⚠️ Could not persist anomaly model for {name}: {e}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_anomaly_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            from data.cache import default_cache_dir
+            _service = AnomalyService(cache_dir=default_cache_dir(), cache_name="anomaly_results")
+        return _service
+
+
+def find_anomalies(df):
+    return get_anomaly_service().flags(df)
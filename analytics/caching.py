@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+
+# Named caches, reported by the tracing layer (analytics/tracing.py) and
+# cleared by evict_version / evict_dataset. Anything with a stats() method
+# returning hits/misses/size/hit_ratio can register, plus discard(version)
+# and forget(dataset) if it keeps per-version or per-dataset state. Only
+# process-wide singletons get a name: a later cache under the same name
+# replaces the earlier one.
+CACHES = {}
+
+
+def register_cache(name, cache):
+    CACHES[name] = cache
+    return cache
+
+
+def evict_version(version):
+    # Drops everything derived from one dataset version from every named cache
+    for cache in list(CACHES.values()):
+        if hasattr(cache, "discard"):
+            cache.discard(version)
+
+
+def evict_dataset(name):
+    # Drops state a cache keeps for a dataset across its versions (e.g. models)
+    for cache in list(CACHES.values()):
+        if hasattr(cache, "forget"):
+            cache.forget(name)
+
+
+class VersionedCache:
+    """Small thread-safe LRU for artifacts derived from one dataset version."""
+
+    def __init__(self, max_entries=8, name=None):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if name:
+            register_cache(name, self)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def get_or_compute(self, key, compute):
+        # key=None means the input is unversioned: compute without caching
+        if key is None:
+            return compute()
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, compute())
+        return value
+
+    def discard(self, version):
+        # Keys are either the version itself or tuples that start with it
+        with self._lock:
+            for key in [k for k in self._entries if k == version or (isinstance(k, tuple) and k[:1] == (version,))]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
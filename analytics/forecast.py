@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+from analytics.aggregates import get_cube
+from analytics.caching import VersionedCache
+
+DEFAULT_BACKEND = "holt"
+WINDOW = 3
+
+BACKENDS = {}
+
+
+def register_backend(name):
+    def decorator(cls):
+        BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+def list_backends():
+    return list(BACKENDS)
+
+
+@register_backend("holt")
+class HoltForecaster:
+    """Holt's linear exponential smoothing, fitted on all series at once.
+
+    ``series`` is an (n_series, n_months) array; the recursion runs over the
+    months while every step is vectorized across the series.
+    """
+
+    def __init__(self, alpha=0.5, beta=0.3):
+        self.alpha = alpha
+        self.beta = beta
+        self.level = None
+        self.trend = None
+
+    def fit(self, series):
+        series = np.asarray(series, dtype=float)
+        self.level = series[:, 0].copy()
+        self.trend = series[:, 1] - series[:, 0] if series.shape[1] > 1 else np.zeros(len(series))
+        for t in range(1, series.shape[1]):
+            previous = self.level
+            self.level = self.alpha * series[:, t] + (1 - self.alpha) * (previous + self.trend)
+            self.trend = self.beta * (self.level - previous) + (1 - self.beta) * self.trend
+        return self
+
+    def predict(self, horizon=1):
+        return np.maximum(self.level + horizon * self.trend, 0)
+
+
+@register_backend("lstm")
+class LSTMForecaster:
+    """The original Keras LSTM on 3-month windows.
+
+    One network is trained on the windows of every series (each min-max
+    scaled on its own) and all next-month predictions come from a single
+    ``predict`` call.
+    """
+
+    def __init__(self, units=50, epochs=50, window=WINDOW):
+        self.units = units
+        self.epochs = epochs
+        self.window = window
+        self.model = None
+
+    def fit(self, series):
+        # TensorFlow is only imported when this backend is actually used
+        from tensorflow.keras.layers import LSTM, Dense
+        from tensorflow.keras.models import Sequential
+
+        series = np.asarray(series, dtype=float)
+        if series.shape[1] <= self.window:
+            raise ValueError(f"LSTM forecast needs more than {self.window} months of data")
+        self.low = series.min(axis=1, keepdims=True)
+        self.span = np.where(series.max(axis=1, keepdims=True) > self.low,
+                             series.max(axis=1, keepdims=True) - self.low, 1.0)
+        scaled = (series - self.low) / self.span
+
+        windows = np.lib.stride_tricks.sliding_window_view(scaled, self.window + 1, axis=1)
+        windows = windows.reshape(-1, self.window + 1)
+        X, y = windows[:, :-1, None], windows[:, -1:]
+        self.last = scaled[:, -self.window:, None]
+
+        self.model = Sequential([
+            LSTM(self.units, activation="relu", input_shape=(self.window, 1)),
+            Dense(1)
+        ])
+        self.model.compile(optimizer="adam", loss="mse")
+        self.model.fit(X, y, epochs=self.epochs, verbose=0)
+        return self
+
+    def predict(self, horizon=1):
+        window = self.last
+        for _ in range(horizon):
+            step = self.model.predict(window, verbose=0)
+            window = np.concatenate([window[:, 1:], step[:, :, None]], axis=1)
+        return (step * self.span + self.low)[:, 0]
+
+
+def monthly_matrix(df, by=None, metric="Revenue"):
+    # Rows are series (one per `by` value, or a single "Total"), columns are
+    # every month between the first and last sale
+    cube = get_cube(df)
+    if by is None:
+        monthly = cube.monthly(metric)
+        return pd.DataFrame([monthly.to_numpy()], index=["Total"], columns=monthly.index)
+    cells = cube.cells.dropna(subset=["Month"])
+    matrix = cells.groupby([by, "Month"], observed=True)[f"{metric}_sum"].sum().unstack("Month")
+    if matrix.empty:
+        return matrix
+    months = pd.period_range(matrix.columns.min(), matrix.columns.max(), freq="M")
+    matrix = matrix.reindex(columns=months, fill_value=0).fillna(0)
+    matrix.columns = matrix.columns.to_timestamp(how="end").normalize()
+    return matrix
+
+
+_models = VersionedCache(max_entries=32, name="forecast_models")
+
+
+def fit_model(df, by=None, metric="Revenue", backend=DEFAULT_BACKEND, **params):
+    version = df.attrs.get("dataset_version")
+    key = None if version is None else (version, by, metric, backend, tuple(sorted(params.items())))
+
+    def fit():
+        matrix = monthly_matrix(df, by=by, metric=metric)
+        if matrix.empty:
+            raise ValueError("No dated sales to forecast")
+        return matrix.index, BACKENDS[backend](**params).fit(matrix.to_numpy())
+
+    return _models.get_or_compute(key, fit)
+
+
+def forecast(df, by=None, metric="Revenue", backend=DEFAULT_BACKEND, horizon=1, **params):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown forecast backend: {backend}")
+    labels, model = fit_model(df, by=by, metric=metric, backend=backend, **params)
+    return pd.Series(model.predict(horizon), index=labels, name=f"Forecast {metric}")
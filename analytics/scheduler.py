@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from analytics.aggregates import get_cube
+from analytics.alerts import get_alert_engine, reference_date
+from analytics.anomalies import find_anomalies
+from analytics.forecast import forecast
+from analytics.tracing import span
+
+SCHEDULER_ENABLED = os.getenv("BIZBUDDY_SCHEDULER", "1") == "1"
+SCHEDULER_INTERVAL = float(os.getenv("BIZBUDDY_SCHEDULER_INTERVAL", "30"))
+SCHEDULER_WORKERS = int(os.getenv("BIZBUDDY_SCHEDULER_WORKERS", "2"))
+
+
+def _forecasts(df):
+    return {by or "Total": forecast(df, by=by) for by in (None, "Product", "Location")}
+
+
+# name -> compute(df); each result is also what the dashboard falls back to
+# computing inline when it asks before the worker has published
+TASKS = {
+    "cube": get_cube,
+    "alerts": lambda df: get_alert_engine(df).evaluate(),
+    "forecast": _forecasts,
+    "anomalies": find_anomalies,
+}
+
+
+@dataclass(frozen=True)
+class Artifacts:
+    version: str
+    reference_date: object
+    values: dict
+    errors: dict = field(default_factory=dict)
+    built_at: float = field(default_factory=time.time)
+    build_seconds: float = 0.0
+
+
+class ArtifactScheduler:
+    """Precomputes dashboard artifacts off the request path.
+
+    A daemon thread polls the dataset store or tenant registry (either
+    revalidates its source on its own TTL) and, for every new dataset version
+    or reference date, runs the tasks on a worker pool. With a registry every
+    resident tenant is covered, read without changing its LRU position. Each
+    finished set is published with a single reference swap, so readers see
+    either the previous complete set or the new one, never a mix.
+    """
+
+    def __init__(self, store=None, dataset=None, tasks=None, interval=SCHEDULER_INTERVAL, workers=SCHEDULER_WORKERS):
+        from data.store import DEFAULT_DATASET, get_store
+
+        self.store = store if store is not None else get_store()
+        self.dataset = dataset or DEFAULT_DATASET
+        self.tasks = dict(TASKS if tasks is None else tasks)
+        self.interval = interval
+        self.workers = workers
+        self.build_count = 0
+        self._published = {}  # dataset -> Artifacts, replaced as a whole
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def latest(self, version=None):
+        # The default dataset's set, or whichever dataset's matches ``version``
+        if version is None:
+            return self._published.get(self.dataset)
+        return next((published for published in self._published.values() if published.version == version), None)
+
+    def _datasets(self):
+        # A tenant registry's resident tenants, or the store's one dataset
+        return list(self.store.usage()) if hasattr(self.store, "usage") else [self.dataset]
+
+    def _snapshot(self, dataset):
+        # Precomputing for a tenant doesn't count as the tenant being used
+        if hasattr(self.store, "usage"):
+            return self.store.get(dataset, touch=False)
+        return self.store.get(dataset)
+
+    def run_once(self):
+        with self._run_lock:
+            datasets = self._datasets()
+            # Tenants evicted since the last run drop out of the published sets
+            published = {name: artifacts for name, artifacts in self._published.items() if name in datasets}
+            self._published = published
+            for dataset in datasets:
+                snapshot = self._snapshot(dataset)
+                if snapshot is not None:
+                    published = {**published, dataset: self._build(snapshot.view(), published.get(dataset))}
+                    self._published = published
+            return self.latest()
+
+    def _build(self, df, current):
+        version, today = df.attrs.get("dataset_version"), reference_date()
+        if current is not None and (current.version, current.reference_date) == (version, today):
+            return current
+
+        def run(name):
+            try:
+                with span(f"precompute.{name}"):
+                    return name, self.tasks[name](df), None
+            except Exception as e:
+                return name, None, f"{type(e).__name__}: {e}"
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="precompute") as executor:
+            results = list(executor.map(run, self.tasks))
+        self.build_count += 1
+        return Artifacts(
+            version=version,
+            reference_date=today,
+            values={name: value for name, value, error in results if error is None},
+            errors={name: error for name, _, error in results if error is not None},
+            build_seconds=time.perf_counter() - start,
+        )
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"⚠️ Background precompute failed: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="artifact-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_scheduler(store=None, dataset=None):
+    # One background worker per process; safe to call on every Streamlit rerun
+    global _scheduler
+    if not SCHEDULER_ENABLED:
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ArtifactScheduler(store=store, dataset=dataset).start()
+        return _scheduler
+
+
+def artifact(df, name):
+    """The published artifact for this frame's dataset version.
+
+    Falls back to computing it inline (through the same cached functions the
+    worker uses) when the worker is disabled or hasn't finished this version.
+    """
+    version = df.attrs.get("dataset_version")
+    published = _scheduler.latest(version) if _scheduler is not None and version is not None else None
+    if published is not None and name in published.values and published.reference_date == reference_date():
+        return published.values[name]
+    return TASKS[name](df)
@@ -0,0 +1,132 @@
+import functools
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from analytics.caching import CACHES
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, math.inf)
+
+
+class Tracer:
+    """Times named spans around the hot paths of a page render.
+
+    Every finished span feeds a per-name duration histogram (exported in the
+    Prometheus text format) and, when ``log_path`` is set, one JSON line in
+    the trace log. Spans finished on the current thread since the last
+    ``begin_rerun()`` are also kept, so a Streamlit rerun can show its own
+    timings.
+    """
+
+    def __init__(self, log_path=None, buckets=BUCKETS):
+        self.log_path = log_path
+        self.buckets = buckets
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def begin_rerun(self):
+        self._local.spans = []
+        return self._local.spans
+
+    def rerun_spans(self):
+        return list(getattr(self._local, "spans", []))
+
+    @contextmanager
+    def span(self, name, **attrs):
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self._local.depth = depth
+            self._record(name, time.perf_counter() - start, depth, error, attrs)
+
+    def traced(self, name=None):
+        def decorator(fn):
+            span_name = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _record(self, name, seconds, depth, error, attrs):
+        record = {"name": name, "duration_ms": round(seconds * 1000, 3), "depth": depth, "error": error, **attrs}
+        spans = getattr(self._local, "spans", None)
+        if spans is not None:
+            spans.append(record)
+        with self._lock:
+            stats = self._stats.setdefault(name, {"count": 0, "sum": 0.0, "errors": 0,
+                                                  "buckets": [0] * len(self.buckets)})
+            stats["count"] += 1
+            stats["sum"] += seconds
+            stats["errors"] += error is not None
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    stats["buckets"][i] += 1
+            if self.log_path:
+                with open(self.log_path, "a") as f:
+                    f.write(json.dumps({"ts": time.time(), **record}, default=str) + "\n")
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(stats, buckets=list(stats["buckets"])) for name, stats in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def prometheus(self):
+        lines = [
+            "# HELP bizbuddy_span_duration_seconds Time spent in each traced span.",
+            "# TYPE bizbuddy_span_duration_seconds histogram",
+        ]
+        snapshot = self.snapshot()
+        for name, stats in sorted(snapshot.items()):
+            for bound, count in zip(self.buckets, stats["buckets"]):
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                lines.append(f'bizbuddy_span_duration_seconds_bucket{{span="{name}",le="{le}"}} {count}')
+            lines.append(f'bizbuddy_span_duration_seconds_sum{{span="{name}"}} {stats["sum"]:.6f}')
+            lines.append(f'bizbuddy_span_duration_seconds_count{{span="{name}"}} {stats["count"]}')
+        lines += ["# HELP bizbuddy_span_errors_total Spans that ended with an exception.",
+                  "# TYPE bizbuddy_span_errors_total counter"]
+        lines += [f'bizbuddy_span_errors_total{{span="{name}"}} {stats["errors"]}'
+                  for name, stats in sorted(snapshot.items())]
+
+        caches = cache_stats()
+        for metric, key, kind, help_text in [
+            ("bizbuddy_cache_hits_total", "hits", "counter", "Cache lookups served from the cache."),
+            ("bizbuddy_cache_misses_total", "misses", "counter", "Cache lookups that had to compute."),
+            ("bizbuddy_cache_entries", "size", "gauge", "Entries currently held by the cache."),
+        ]:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+            lines += [f'{metric}{{cache="{name}"}} {stats[key]}' for name, stats in sorted(caches.items())]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # Atomic, for node_exporter's textfile collector or any scraper sidecar
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus())
+        os.replace(tmp_path, path)
+
+
+def cache_stats():
+    return {name: cache.stats() for name, cache in list(CACHES.items())}
+
+
+tracer = Tracer(log_path=os.getenv("BIZBUDDY_TRACE_LOG"))
+span = tracer.span
+traced = tracer.traced
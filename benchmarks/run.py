@@ -0,0 +1,108 @@
+"""Benchmarks over synthetic datasets.
+
+    python -m benchmarks.run --sizes 10k 1m 10m --out benchmarks/results.jsonl
+
+Each stage is timed per dataset size and appended as one JSON line, so runs
+from different commits can be compared side by side.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.synthetic import write_csv
+from data.frame import enable_copy_on_write
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+ROUTER_QUESTIONS = [
+    "What are the top 3 selling products by total number of Units_Sold?",
+    "total revenue in North",
+    "Which items are low on stock?",
+    "what expires within 30 days",
+]
+AGENT_QUESTIONS = ["How many rows are in the dataset?"] * 8
+
+
+def _commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def _timed(stages, name, fn, repeat=1):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    stages[name] = round(best * 1000, 3)
+    return result
+
+
+def run_size(label, rows, workdir, agent=True):
+    from analytics.aggregates import AggregateCube
+    from agent.router import IntentRouter
+    from data.store import DatasetStore
+
+    stages = {}
+    csv = _timed(stages, "generate_csv_ms", lambda: write_csv(rows, os.path.join(workdir, f"{label}.csv")))
+    cache_dir = os.path.join(workdir, f"cache-{label}")
+    datasets = {"bench": csv}
+
+    snapshot = _timed(stages, "parse_prepare_ms", lambda: DatasetStore(datasets, cache_dir=cache_dir).get("bench"))
+    # A second process start: the Arrow cache instead of the CSV
+    _timed(stages, "arrow_cache_load_ms", lambda: DatasetStore(datasets, cache_dir=cache_dir).get("bench"))
+    df = snapshot.view()
+
+    cube = _timed(stages, "cube_build_ms", lambda: AggregateCube.build(df))
+    _timed(stages, "dashboard_panels_ms", lambda: [cube.monthly(), cube.by("Product"), cube.by("Location"),
+                                                   cube.by("Product", "Inventory_After", how="min")], repeat=3)
+    router = IntentRouter(df)
+    _timed(stages, "router_answers_ms", lambda: [router.answer(q) for q in ROUTER_QUESTIONS], repeat=3)
+
+    if agent:
+        from agent.batch import FakeAgentModel, run_batch
+
+        # Prompt, tool call through the sandbox and final answer, without a real LLM
+        results = _timed(stages, "agent_batch_ms", lambda: run_batch(AGENT_QUESTIONS, FakeAgentModel(), df,
+                                                                     use_router=False))
+        latencies = sorted(r["latency_ms"] for r in results)
+        stages["agent_p50_ms"] = latencies[len(latencies) // 2]
+        stages["agent_errors"] = sum(1 for r in results if r["error"])
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "size": label,
+        "rows": rows,
+        "memory_mb": round(df.memory_usage(deep=True).sum() / 1e6, 1),
+        **stages,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time BizBuddy's data, dashboard and agent paths.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["10k", "1m"])
+    parser.add_argument("--out", default="benchmarks/results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--no-agent", action="store_true", help="skip the (fake-LLM) agent stage")
+    args = parser.parse_args(argv)
+    # Timed under the same pandas mode as the app
+    enable_copy_on_write()
+
+    with tempfile.TemporaryDirectory(prefix="bizbuddy-bench-") as workdir:
+        for label in args.sizes:
+            record = run_size(label, SIZES[label], workdir, agent=not args.no_agent)
+            with open(args.out, "a") as f:
+                f.write(json.dumps(record) + "\n")
+            print(json.dumps(record))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+PRODUCTS = ["Aspirin", "Ibuprofen", "Paracetamol", "Vitamin C", "Amoxicillin", "Cetirizine",
+            "Omeprazole", "Metformin", "Loratadine", "Insulin", "Cough Syrup", "Antacid"]
+LOCATIONS = ["North", "South", "East", "West", "Central"]
+PLATFORMS = ["Store", "Online", "App"]
+
+
+def synthetic_sales(rows, seed=0, start="2024-01-01", days=540):
+    """Pharmacy-shaped sales data with the same raw columns as the Google Sheet."""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, rows), unit="D")
+    units = rng.integers(1, 20, rows)
+    unit_price = rng.choice(np.arange(2.5, 60, 2.5), rows)
+    cost_price = np.round(unit_price * rng.uniform(0.4, 0.8, rows), 2)
+    return pd.DataFrame({
+        "Order Date": dates,
+        "Product": rng.choice(PRODUCTS, rows),
+        "Location": rng.choice(LOCATIONS, rows),
+        "Platform": rng.choice(PLATFORMS, rows),
+        "Units_Sold": units,
+        "Unit_Price": unit_price,
+        "Cost_Price": cost_price,
+        "Revenue": units * unit_price,
+        "Profit": np.round(units * (unit_price - cost_price), 2),
+        "Inventory_After": rng.integers(0, 500, rows),
+        "Product_Expiry_Date": dates + pd.to_timedelta(rng.integers(30, 720, rows), unit="D"),
+    })
+
+
+def write_csv(rows, path, seed=0):
+    synthetic_sales(rows, seed=seed).to_csv(path, index=False, date_format="%Y-%m-%d")
+    return path
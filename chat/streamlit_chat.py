@@ -1,15 +1,15 @@
 import streamlit as st
+from agent.router import answer_question
 
-def chatbot_view(agent):
+def chatbot_view(agent, df=None):
            st.title("💬 BizBuddy AI Chatbot")
            st.markdown("Chat naturally with your business data.")
 
            if st.button("🗑️ Clear Chat"):
                st.session_state.chat_history = []
-               if "agent" in st.session_state:
-                   del st.session_state.agent
-               from agent.agent import load_agent
-               st.session_state.agent = load_agent()
+               # Only the conversation memory is cleared; nothing is reloaded
+               from agent.agent import reset_session_memory
+               reset_session_memory(st.session_state)
                st.rerun()
 
            if "chat_history" not in st.session_state:
@@ -29,7 +29,7 @@ def chatbot_view(agent):
                with st.chat_message("assistant"):
                    with st.spinner("Thinking..."):
                        try:
-                           response = agent.run(user_input)
+                           response = answer_question(user_input, agent, df)
                            st.markdown(response)
                            st.session_state.chat_history.append(("assistant", response))
                        except Exception as e:
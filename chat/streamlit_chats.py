@@ -1,23 +1,58 @@
 import streamlit as st
-import io
-import os
-import sys
+from agent.memory import TokenUsageHandler, memory_tokens
+from agent.response_cache import get_response_cache
+from agent.router import lookup_answer, remember_answer, remember_turn
+from agent.streaming import stream_agent
+from analytics.tracing import span
+from dashboard.report import pdf_text
 from fpdf import FPDF
-import pandas as pd
 
-def chatbot_view(agent):
+def stream_response(agent, question, callbacks=None):
+    # Tool steps go into a collapsible status box, answer tokens render as they arrive
+    status = st.status("Thinking...", expanded=False)
+    placeholder = st.empty()
+    tokens, answer = [], None
+    for event in stream_agent(agent, question, callbacks=callbacks):
+        kind = event[0]
+        if kind == "tool":
+            status.write(f"🔧 `{event[1]}`: {event[2]}")
+            # Anything streamed before a tool call was the model thinking aloud
+            tokens = []
+            placeholder.empty()
+        elif kind == "tool_end":
+            status.write(f"↳ {str(event[2])[:500]}")
+        elif kind == "token":
+            tokens.append(event[1])
+            placeholder.markdown("".join(tokens) + "▌")
+        elif kind == "final":
+            answer = event[1]
+    answer = answer if answer is not None else "".join(tokens)
+    placeholder.markdown(answer)
+    status.update(label="Done", state="complete")
+    return answer
+
+def chat_pdf(history):
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    for role, message in history:
+        pdf.set_font("Helvetica", style="B", size=12)
+        pdf.cell(0, 10, f"{role.capitalize()}: ", new_x="LMARGIN", new_y="NEXT")
+        pdf.set_font("Helvetica", size=12)
+        pdf.multi_cell(0, 10, pdf_text(message))
+        pdf.ln()
+    return bytes(pdf.output())
+
+def chatbot_view(agent, df=None):
     st.title("💬 BizBuddy AI Chatbot")
     st.markdown("Chat naturally with your business data.")
 
     # 🗑️ Clear chat button
     if st.button("🗑️ Clear Chat"):
         st.session_state.chat_history = []
-        # Reset the agent to clear memory
-        if "agent" in st.session_state:
-            del st.session_state.agent
-        # Reload the agent to reset memory
-        from agent.bizbuddy_agent import load_agent
-        st.session_state.agent = load_agent()  # Reset memory
+        # Only the conversation memory is cleared; nothing is reloaded
+        from agent.agent import reset_session_memory
+        reset_session_memory(st.session_state)
         st.rerun()
 
     # Initialize chat history in Streamlit session state
@@ -38,37 +73,38 @@ def chatbot_view(agent):
         with st.chat_message("user"):
             st.markdown(user_input)
 
-        # Agent response
+        # Agent response: instant answers first, otherwise stream the agent run
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                try:
-                    response = agent.run(user_input)
+            try:
+                cache = get_response_cache()
+                response = lookup_answer(user_input, df, cache)
+                if response is not None:
                     st.markdown(response)
-                    st.session_state.chat_history.append(("assistant", response))
-                except Exception as e:
-                    st.error(f"⚠️ Error: {str(e)}")
+                    remember_turn(agent, user_input, response)
+                else:
+                    usage = TokenUsageHandler()
+                    with span("agent.run"):
+                        response = stream_response(agent, user_input, callbacks=[usage])
+                    remember_answer(user_input, response, df, cache)
+                    # Per-turn prompt size and what the bounded memory now carries into the next one
+                    held = memory_tokens(agent.memory)
+                    st.session_state.setdefault("token_usage", []).append(dict(usage.as_dict(), memory_tokens=held))
+                    memory_note = f"; memory holds {held:,} tokens" if held is not None else ""
+                    st.caption(f"🧮 {usage.prompt_tokens:,} prompt + {usage.completion_tokens:,} completion tokens over {usage.llm_calls} LLM calls{memory_note}")
+                st.session_state.chat_history.append(("assistant", response))
+            except Exception as e:
+                st.error(f"⚠️ Error: {str(e)}")
 
-    # PDF download button
+    # Chat PDF: built only when asked for, and reused until the chat changes
     if st.session_state.chat_history:
-        pdf_buffer = io.BytesIO()
-        pdf = FPDF()
-        pdf.set_auto_page_break(auto=True, margin=15)
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-
-        for role, message in st.session_state.chat_history:
-            pdf.set_font("Arial", style='B', size=12)
-            pdf.cell(0, 10, f"{role.capitalize()}: ", ln=True)
-            pdf.set_font("Arial", size=12)
-            pdf.multi_cell(0, 10, message)
-            pdf.ln()
-
-        pdf.output(pdf_buffer)
-        pdf_buffer.seek(0)
-
-        st.download_button(
-            label="📥 Download Chat as PDF",
-            data=pdf_buffer,
-            file_name="chat_history.pdf",
-            mime="application/pdf"
-        )
\ No newline at end of file
+        history = tuple(st.session_state.chat_history)
+        if st.button("📄 Prepare Chat PDF"):
+            st.session_state.chat_pdf = (history, chat_pdf(history))
+        prepared = st.session_state.get("chat_pdf")
+        if prepared is not None and prepared[0] == history:
+            st.download_button(
+                label="📥 Download Chat as PDF",
+                data=prepared[1],
+                file_name="chat_history.pdf",
+                mime="application/pdf"
+            )
@@ -0,0 +1,36 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+from analytics.tracing import cache_stats, tracer
+from data.tenants import get_registry
+
+ADMIN_ENABLED = os.getenv("BIZBUDDY_ADMIN", "0") == "1"
+
+
+def admin_sidebar():
+    # Rendered last in main.py so every span of this rerun has finished
+    with st.sidebar.expander("🛠️ Performance", expanded=False):
+        spans = tracer.rerun_spans()
+        if spans:
+            timings = pd.DataFrame(spans)[["name", "duration_ms", "depth"]]
+            timings["name"] = ["  " * depth + name for depth, name in zip(timings["depth"], timings["name"])]
+            st.caption(f"This rerun: {sum(s['duration_ms'] for s in spans if s['depth'] == 0):,.1f} ms traced")
+            st.dataframe(timings.drop(columns="depth"), hide_index=True, use_container_width=True)
+
+        caches = cache_stats()
+        if caches:
+            st.caption("Cache hit ratios")
+            ratios = pd.DataFrame.from_dict(caches, orient="index")[["hit_ratio", "hits", "misses", "size"]]
+            st.dataframe(ratios.style.format({"hit_ratio": "{:.0%}"}), use_container_width=True)
+
+        registry = get_registry()
+        usage = registry.usage()
+        if usage:
+            st.caption(f"Resident tenants: {sum(usage.values()) / 2**20:,.1f} of "
+                       f"{registry.memory_budget / 2**20:,.0f} MB, {registry.evictions} evicted")
+            st.dataframe(pd.Series(usage, name="bytes").to_frame(), use_container_width=True)
+
+        st.download_button("Download metrics (Prometheus)", tracer.prometheus(),
+                           file_name="bizbuddy_metrics.txt", mime="text/plain")
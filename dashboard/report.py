@@ -0,0 +1,114 @@
+import pandas as pd
+from fpdf import FPDF
+
+from analytics.aggregates import get_cube
+from analytics.alerts import LOW_STOCK_THRESHOLD, get_alert_engine, reference_date
+from analytics.caching import VersionedCache
+
+TOP_N = 10
+BAR_COLOR = (66, 133, 244)
+
+
+def pdf_text(value):
+    # The built-in PDF fonts are Latin-1 only; emoji and the like become "?"
+    return str(value).encode("latin-1", "replace").decode("latin-1")
+
+
+def _money(value):
+    return f"${value:,.2f}" if pd.notna(value) else "N/A"
+
+
+class _Report(FPDF):
+    def heading(self, text):
+        self.ln(4)
+        self.set_font("Helvetica", style="B", size=13)
+        self.cell(0, 8, pdf_text(text), new_x="LMARGIN", new_y="NEXT")
+        self.set_font("Helvetica", size=10)
+
+    def table(self, rows, headers, widths):
+        self.set_font("Helvetica", style="B", size=10)
+        for header, width in zip(headers, widths):
+            self.cell(width, 7, pdf_text(header), border=1)
+        self.ln()
+        self.set_font("Helvetica", size=10)
+        for row in rows:
+            for value, width in zip(row, widths):
+                self.cell(width, 6, pdf_text(value), border=1)
+            self.ln()
+
+    def bar_chart(self, series, value_format=_money, width=170, bar_height=5):
+        # Horizontal bars drawn with plain rectangles: no plotting or image
+        # libraries are needed to put a chart in the report
+        peak = series.max() if len(series) else 0
+        label_width, value_width = 45, 30
+        self.set_font("Helvetica", size=9)
+        self.set_fill_color(*BAR_COLOR)
+        for label, value in series.items():
+            y = self.get_y()
+            self.cell(label_width, bar_height, pdf_text(label)[:28])
+            length = (width - label_width - value_width) * (value / peak) if peak > 0 and value > 0 else 0
+            if length:
+                self.rect(self.get_x(), y + 0.75, length, bar_height - 1.5, style="F")
+            self.set_x(self.l_margin + width - value_width)
+            self.cell(value_width, bar_height, value_format(value), align="R", new_x="LMARGIN", new_y="NEXT")
+        self.set_font("Helvetica", size=10)
+
+
+def build_report(df):
+    """Summary PDF of the dashboard, built from the aggregate cube.
+
+    Only aggregates go in (KPIs, monthly revenue, top products and locations,
+    low stock), so the cost does not grow with the number of raw rows.
+    """
+    cube = get_cube(df)
+    version = df.attrs.get("dataset_version")
+
+    pdf = _Report()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Helvetica", style="B", size=18)
+    pdf.cell(0, 12, "BizBuddy AI Dashboard Report", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", size=9)
+    stamp = f"Generated {pd.Timestamp.now():%Y-%m-%d %H:%M} from {cube.rows:,} sales rows"
+    pdf.cell(0, 6, stamp + (f" (data version {version})" if version else ""), new_x="LMARGIN", new_y="NEXT")
+
+    pdf.heading("Key Performance Indicators")
+    kpis = [("Total Revenue", _money(cube.total("Revenue"))),
+            ("Total Units Sold", f"{cube.total('Units_Sold'):,.0f}")]
+    if "Profit" in df.columns:
+        kpis.append(("Total Profit", _money(cube.total("Profit"))))
+    pdf.table(kpis, ["Metric", "Value"], [60, 50])
+
+    monthly = cube.monthly("Revenue")
+    if not monthly.empty:
+        pdf.heading("Monthly Revenue")
+        monthly.index = monthly.index.strftime("%Y-%m")
+        pdf.bar_chart(monthly.tail(24))
+
+    for dimension in ["Product", "Location", "Platform"]:
+        if cube.has(dimension):
+            revenue = cube.by(dimension, "Revenue").sort_values(ascending=False).head(TOP_N)
+            pdf.heading(f"Revenue by {dimension} (top {TOP_N})")
+            pdf.bar_chart(revenue)
+
+    alerts = get_alert_engine(df).evaluate()
+    pdf.heading(f"Products with Low Inventory (< {LOW_STOCK_THRESHOLD}) as of {alerts.reference_date.date()}")
+    if alerts.low_stock.empty:
+        pdf.cell(0, 6, "No products with low inventory.", new_x="LMARGIN", new_y="NEXT")
+    else:
+        rows = [(row.Product, row.Location, f"{row.Inventory_After:,.0f}")
+                for row in alerts.low_stock.itertuples(index=False)]
+        pdf.table(rows, ["Product", "Location", "Stock"], [70, 50, 30])
+
+    return bytes(pdf.output())
+
+
+_reports = VersionedCache(max_entries=4, name="reports")
+
+
+def get_report(df):
+    # One report per dataset version and day (the stock alerts are dated);
+    # every session downloads the same bytes
+    version = df.attrs.get("dataset_version")
+    key = None if version is None else (version, reference_date())
+    return _reports.get_or_compute(key, lambda: build_report(df))
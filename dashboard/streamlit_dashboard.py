@@ -1,49 +1,43 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-import pdfkit
-import tempfile
-import os
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import MinMaxScaler
-import numpy as np
+from analytics.alerts import EXPIRY_DAYS
+from analytics.forecast import DEFAULT_BACKEND, forecast, list_backends
+from analytics.scheduler import artifact
+from analytics.tracing import span, traced
+from dashboard.report import get_report
+from data.export import FORMATS, ExportFilter, get_export
+from data.frame import ensure_prepared, missing_columns
+from data.sources import load_rows
 
-def forecast_sales(df):
+EXPIRED_SHOWN = 10
+
+@traced()
+def forecast_sales(df, backend=DEFAULT_BACKEND):
            st.subheader("📈 Sales Forecast")
            try:
-               sales = df.groupby(pd.Grouper(key="Date", freq="M"))["Revenue"].sum().values
-               scaler = MinMaxScaler()
-               sales_scaled = scaler.fit_transform(sales.reshape(-1, 1))
-               X, y = [], []
-               for i in range(3, len(sales_scaled)):
-                   X.append(sales_scaled[i-3:i])
-                   y.append(sales_scaled[i])
-               X, y = np.array(X), np.array(y)
-
-               model = Sequential([
-                   LSTM(50, activation="relu", input_shape=(3, 1)),
-                   Dense(1)
-               ])
-               model.compile(optimizer="adam", loss="mse")
-               model.fit(X, y, epochs=50, verbose=0)
-
-               last_3 = sales_scaled[-3:]
-               pred = model.predict(np.array([last_3]), verbose=0)
-               pred_unscaled = scaler.inverse_transform(pred)[0][0]
-               st.write(f"Predicted Revenue for Next Month: ${pred_unscaled:,.2f}")
+               # The default backend is precomputed in the background; other
+               # backends are fitted here once and cached per dataset version
+               if backend == DEFAULT_BACKEND:
+                   forecasts = artifact(df, "forecast")
+               else:
+                   forecasts = {by or "Total": forecast(df, by=by, backend=backend) for by in (None, "Product", "Location")}
+               st.write(f"Predicted Revenue for Next Month: ${forecasts['Total'].iloc[0]:,.2f}")
+               col1, col2 = st.columns(2)
+               with col1:
+                   st.dataframe(forecasts["Product"].sort_values(ascending=False))
+               with col2:
+                   st.dataframe(forecasts["Location"].sort_values(ascending=False))
            except Exception as e:
                st.warning(f"Error in sales forecasting: {e}")
 
+@traced()
 def detect_anomalies(df):
            st.subheader("🚨 Anomaly Detection")
            try:
-               features = df[["Revenue", "Units_Sold", "Inventory_After"]].dropna()
-               model = IsolationForest(contamination=0.1, random_state=42)
-               model.fit(features)
-               df["Anomaly"] = model.predict(features)
-               anomalies = df[df["Anomaly"] == -1][["Date", "Product", "Revenue", "Units_Sold"]]
+               flags = artifact(df, "anomalies")
+               rows = load_rows(df, [col for col in ["Date", "Product", "Revenue", "Units_Sold"] if col in df.columns])
+               anomalies = rows.loc[flags.index[flags == -1]]
                if not anomalies.empty:
                    st.dataframe(anomalies)
                else:
@@ -51,207 +45,230 @@ def detect_anomalies(df):
            except Exception as e:
                st.warning(f"Error in anomaly detection: {e}")
 
+@traced()
 def export_to_pdf(df):
            st.subheader("📄 Export Dashboard as PDF")
+           # Built only on request, from the aggregates, and cached per data version
+           version = df.attrs.get("dataset_version")
+           if st.button("Generate PDF Report"):
+               st.session_state["report_version"] = version
+           if "report_version" not in st.session_state or st.session_state["report_version"] != version:
+               return
            try:
-               html = f"<h1>BizBuddy AI Dashboard</h1><p>Generated on {pd.Timestamp.today()}</p>"
-               html += df.to_html()
-               with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as tmp:
-                   tmp.write(html.encode())
-                   tmp_path = tmp.name
-               pdf_path = "dashboard.pdf"
-               pdfkit.from_file(tmp_path, pdf_path)
-               with open(pdf_path, "rb") as f:
-                   st.download_button("Download Dashboard as PDF", f, "dashboard.pdf", "application/pdf")
-               os.remove(tmp_path)
-               os.remove(pdf_path)
+               with span("report.build"):
+                   report = get_report(df)
+               st.download_button("Download Dashboard as PDF", report, "dashboard.pdf", "application/pdf")
            except Exception as e:
                st.error(f"Error generating PDF: {e}")
 
+@traced()
+def export_data(df):
+           # Filter choices come from the cube, so rendering this costs nothing;
+           # the file itself is only serialized when the button is pressed
+           cube = artifact(df, "cube")
+           col1, col2 = st.columns(2)
+           with col1:
+               fmt = st.selectbox("Format", list(FORMATS), format_func=lambda f: FORMATS[f][0])
+               months = cube.cells["Month"].dropna() if cube.has("Month") else pd.Series(dtype="period[M]")
+               dates = None
+               if not months.empty:
+                   first, last = months.min().start_time.date(), months.max().end_time.date()
+                   dates = st.date_input("Date range", (first, last), min_value=first, max_value=last)
+           with col2:
+               locations = st.multiselect("Locations", list(cube.by("Location").index)) if cube.has("Location") else []
+               products = st.multiselect("Products", list(cube.by("Product").index)) if cube.has("Product") else []
+
+           start, end = (dates if isinstance(dates, tuple) and len(dates) == 2 else (None, None))
+           filters = ExportFilter(start=start, end=end, locations=tuple(locations), products=tuple(products))
+           request = (df.attrs.get("dataset_version"), fmt, filters)
+           if st.button("Prepare Export"):
+               st.session_state["export_request"] = request
+           if st.session_state.get("export_request") != request:
+               return
+           try:
+               with span("export.build", format=fmt):
+                   data = get_export(df, fmt, filters)
+               extension, mime = FORMATS[fmt]
+               st.download_button("Download Data for Power BI", data, f"powerbi_data{extension}", mime)
+           except Exception as e:
+               st.error(f"Error generating export: {e}")
+
 def dashboard_view(df):
            st.title("BizBuddy AI Dashboard")
            st.markdown("Key metrics and trends for your pharmacy business.")
 
-           required_cols = ["Date", "Product", "Revenue", "Units_Sold", "Inventory_After", "Location"]
-           optional_cols = ["Expiry Date", "Platform"]
-           missing_cols = [col for col in required_cols if col not in df.columns]
+           missing_cols = missing_columns(df)
            if missing_cols:
                st.error(f"Missing required columns: {', '.join(missing_cols)}")
                return
 
+           # Frames from the dataset store are already typed; this is a no-op for them
            try:
-               df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-               if "Expiry Date" in df.columns:
-                   df["Expiry Date"] = pd.to_datetime(df["Expiry Date"], errors="coerce")
+               df = ensure_prepared(df)
            except Exception as e:
-               st.error(f"Date conversion error: {e}")
+               st.error(f"Data preparation error: {e}")
                return
 
-           numeric_cols = ["Revenue", "Units_Sold", "Inventory_After", "Unit_Price", "Cost_Price", "Profit"]
-           for col in numeric_cols:
-               if col in df.columns:
-                   try:
-                       df[col] = pd.to_numeric(df[col], errors="coerce")
-                   except Exception as e:
-                       st.error(f"Error converting {col} to numeric: {e}")
-                       return
+           with span("dashboard.cube"):
+               # Every KPI and chart below reads from this cube instead of the raw rows
+               cube = artifact(df, "cube")
+               product_revenue = cube.by("Product", "Revenue").sort_values(ascending=False)
+               product_profit = cube.by("Product", "Profit") if "Profit" in df.columns else None
 
-           st.subheader("Key Performance Indicators")
-           col1, col2, col3, col4 = st.columns(4)
-           total_revenue = df["Revenue"].sum()
-           total_units = df["Units_Sold"].sum()
-           top_product = df.groupby("Product")["Revenue"].sum().idxmax() if not df["Product"].empty else "N/A"
-           top_location = df.groupby("Location")["Revenue"].sum().idxmax() if not df["Location"].empty else "N/A"
+           with span("dashboard.kpis"):
+               st.subheader("Key Performance Indicators")
+               col1, col2, col3, col4 = st.columns(4)
+               total_revenue = cube.total("Revenue")
+               total_units = cube.total("Units_Sold")
+               top_product = product_revenue.idxmax() if not product_revenue.empty else "N/A"
+               location_revenue = cube.by("Location", "Revenue")
+               top_location = location_revenue.idxmax() if not location_revenue.empty else "N/A"
 
-           with col1:
-               st.metric("💵 Total Revenue", f"${total_revenue:,.2f}" if pd.notna(total_revenue) else "N/A")
-           with col2:
-               st.metric("📦 Total Units Sold", f"{total_units:,.0f}" if pd.notna(total_units) else "N/A")
-           with col3:
-               st.metric("🏆 Top Product", top_product)
-           with col4:
-               st.metric("📍 Top Location", top_location)
+               with col1:
+                   st.metric("💵 Total Revenue", f"${total_revenue:,.2f}" if pd.notna(total_revenue) else "N/A")
+               with col2:
+                   st.metric("📦 Total Units Sold", f"{total_units:,.0f}" if pd.notna(total_units) else "N/A")
+               with col3:
+                   st.metric("🏆 Top Product", top_product)
+               with col4:
+                   st.metric("📍 Top Location", top_location)
 
-           st.subheader("📈 Monthly Revenue Trend")
-           try:
-               monthly = df.groupby(pd.Grouper(key="Date", freq="M"))["Revenue"].sum().reset_index()
-               if not monthly.empty:
-                   chart_data = monthly.rename(columns={"Date": "Month"}).set_index("Month")
-                   st.line_chart(chart_data)
-               else:
-                   st.warning("No data available for monthly revenue trend.")
-           except Exception as e:
-               st.warning(f"Error rendering monthly revenue trend: {e}")
+           with span("dashboard.monthly_trend"):
+               st.subheader("📈 Monthly Revenue Trend")
+               try:
+                   monthly = cube.monthly("Revenue")
+                   if not monthly.empty:
+                       st.line_chart(monthly.to_frame())
+                   else:
+                       st.warning("No data available for monthly revenue trend.")
+               except Exception as e:
+                   st.warning(f"Error rendering monthly revenue trend: {e}")
 
-           st.subheader("📊 Revenue by Product")
-           try:
-               product_revenue = df.groupby("Product")["Revenue"].sum().sort_values(ascending=False)
-               if not product_revenue.empty:
-                   st.bar_chart(product_revenue)
+           with span("dashboard.revenue_by_product"):
+               st.subheader("📊 Revenue by Product")
+               try:
+                   if not product_revenue.empty:
+                       st.bar_chart(product_revenue)
+                   else:
+                       st.warning("No data available for revenue by product.")
+               except Exception as e:
+                   st.warning(f"Error rendering revenue by product: {e}")
+
+           with span("dashboard.revenue_by_platform"):
+               if "Platform" in df.columns:
+                   st.subheader("🛍️ Revenue by Platform")
+                   try:
+                       platform_revenue = cube.by("Platform", "Revenue").sort_values(ascending=False)
+                       if not platform_revenue.empty:
+                           st.bar_chart(platform_revenue)
+                       else:
+                           st.warning("No data available for revenue by platform.")
+                   except Exception as e:
+                       st.warning(f"Error rendering revenue by platform: {e}")
                else:
-                   st.warning("No data available for revenue by product.")
-           except Exception as e:
-               st.warning(f"Error rendering revenue by product: {e}")
+                   st.info("Platform data not available.")
 
-           if "Platform" in df.columns:
-               st.subheader("🛍️ Revenue by Platform")
+           with span("dashboard.revenue_by_location"):
+               st.subheader("🗺️ Revenue by Location")
                try:
-                   platform_revenue = df.groupby("Platform")["Revenue"].sum().sort_values(ascending=False)
-                   if not platform_revenue.empty:
-                       st.bar_chart(platform_revenue)
+                   if not location_revenue.empty:
+                       fig = px.bar(location_revenue.reset_index(), x="Location", y="Revenue", color="Location", title="Revenue by Location")
+                       st.plotly_chart(fig)
                    else:
-                       st.warning("No data available for revenue by platform.")
+                       st.warning("No data available for revenue by location.")
                except Exception as e:
-                   st.warning(f"Error rendering revenue by platform: {e}")
-           else:
-               st.info("Platform data not available.")
+                   st.warning(f"Error rendering revenue by location: {e}")
 
-           st.subheader("🗺️ Revenue by Location")
-           try:
-               location_revenue = df.groupby("Location")["Revenue"].sum().reset_index()
-               if not location_revenue.empty:
-                   fig = px.bar(location_revenue, x="Location", y="Revenue", color="Location", title="Revenue by Location")
-                   st.plotly_chart(fig)
-               else:
-                   st.warning("No data available for revenue by location.")
-           except Exception as e:
-               st.warning(f"Error rendering revenue by location: {e}")
+           with span("dashboard.alerts"):
+               # Every stock and expiry panel reads from one evaluation of the
+               # alert engine (latest stock per product/location, sorted expiries)
+               alerts = artifact(df, "alerts")
+               st.caption(f"Alerts as of {alerts.reference_date.date()}")
 
-           st.subheader("📦 Products with Low Inventory")
-           try:
-               low_stock = df[df["Inventory_After"] < 20].groupby("Product")["Inventory_After"].min().sort_values().reset_index().head(10)
-               if not low_stock.empty:
-                   st.dataframe(low_stock)
+           with span("dashboard.low_inventory"):
+               st.subheader("📦 Products with Low Inventory")
+               if not alerts.low_stock.empty:
+                   st.dataframe(alerts.low_stock.head(10))
                    st.warning("Alert: Low inventory detected!")
                else:
                    st.write("No products with low inventory.")
-           except Exception as e:
-               st.warning(f"Error rendering low inventory alerts: {e}")
 
-           if "Expiry Date" in df.columns:
-               st.subheader("⏰ Upcoming Expiry Medicines (Next 60 Days)")
-               try:
-                   exp_soon = df[df["Expiry Date"] <= pd.Timestamp("2025-07-21") + pd.Timedelta(days=60)]
-                   exp_soon_display = exp_soon[["Product", "Expiry Date", "Inventory_After"]].drop_duplicates()
-                   if not exp_soon_display.empty:
-                       st.dataframe(exp_soon_display)
+           with span("dashboard.expiry_alerts"):
+               if "Expiry Date" in df.columns:
+                   st.subheader(f"⏰ Upcoming Expiry Medicines (Next {EXPIRY_DAYS} Days)")
+                   if not alerts.expiring.empty:
+                       st.dataframe(alerts.expiring)
                        st.warning("Alert: Expiry risk detected!")
                    else:
-                       st.write("No products expiring within the next 60 days.")
-               except Exception as e:
-                   st.warning(f"Error rendering expiry alerts: {e}")
-           else:
-               st.info("Expiry date data not available.")
+                       st.write(f"No products expiring within the next {EXPIRY_DAYS} days.")
+                   if not alerts.expired.empty:
+                       # Stock is tracked per product/location, not per batch,
+                       # so these are batches to check, most recent first
+                       st.info(f"{len(alerts.expired)} past-expiry batches at locations that still report stock "
+                               f"(showing the {min(len(alerts.expired), EXPIRED_SHOWN)} most recent).")
+                       st.dataframe(alerts.expired.head(EXPIRED_SHOWN))
+               else:
+                   st.info("Expiry date data not available.")
 
+           forecast_backend = st.selectbox("Forecast model", list_backends(), index=list_backends().index(DEFAULT_BACKEND))
            if st.button("Run Sales Forecast"):
-               forecast_sales(df)
+               forecast_sales(df, backend=forecast_backend)
 
            if st.button("Detect Anomalies"):
                detect_anomalies(df)
 
            export_to_pdf(df)
 
-           st.subheader("📊 Power BI Integration")
-           st.write("Download the dataset and import it into Power BI for advanced visualizations.")
-           try:
-               csv = df.to_csv(index=False)
-               st.download_button(
-                   label="Download Data for Power BI",
-                   data=csv,
-                   file_name="powerbi_data.csv",
-                   mime="text/csv",
-               )
-           except Exception as e:
-               st.error(f"Error generating Power BI CSV: {e}")
+           with span("dashboard.powerbi_export"):
+               st.subheader("📊 Power BI Integration")
+               st.write("Download the dataset and import it into Power BI for advanced visualizations.")
+               export_data(df)
 
-           st.subheader("🎯 Top Profit Contributors")
-           try:
-               top_profit = df.groupby("Product")["Profit"].sum().sort_values(ascending=False).head(3)
-               if not top_profit.empty:
-                   st.bar_chart(top_profit)
-                   st.write("Top 3 Profit Contributors:", top_profit.index.tolist())
-               else:
-                   st.warning("No data available for profit contributors.")
-           except Exception as e:
-               st.warning(f"Error rendering top profit contributors: {e}")
-
-           st.subheader("🤖 Product Recommendations")
-           if st.button("Generate Recommendations"):
+           with span("dashboard.top_profit"):
+               st.subheader("🎯 Top Profit Contributors")
                try:
-                   top_products = df.groupby("Product")["Revenue"].sum().sort_values(ascending=False).head(3).index
-                   st.write(f"Recommended Products: {', '.join(top_products)} based on revenue.")
+                   top_profit = product_profit.sort_values(ascending=False).head(3)
+                   if not top_profit.empty:
+                       st.bar_chart(top_profit)
+                       st.write("Top 3 Profit Contributors:", top_profit.index.tolist())
+                   else:
+                       st.warning("No data available for profit contributors.")
                except Exception as e:
-                   st.warning(f"Error generating recommendations: {e}")
+                   st.warning(f"Error rendering top profit contributors: {e}")
 
-           st.subheader("🏅 High/Low Performers")
-           try:
-               perf = df.groupby("Product")["Profit"].mean().sort_values()
-               low_performers = perf.head(3).index.tolist()
-               high_performers = perf.tail(3).index.tolist()
-               st.write("Low Performers:", low_performers)
-               st.write("High Performers:", high_performers)
-           except Exception as e:
-               st.warning(f"Error rendering performers: {e}")
+           with span("dashboard.recommendations"):
+               st.subheader("🤖 Product Recommendations")
+               if st.button("Generate Recommendations"):
+                   try:
+                       top_products = product_revenue.head(3).index
+                       st.write(f"Recommended Products: {', '.join(top_products)} based on revenue.")
+                   except Exception as e:
+                       st.warning(f"Error generating recommendations: {e}")
 
-           st.subheader("🛒 Auto Reorder Suggestions")
-           try:
-               reorder = df[df["Inventory_After"] < 30].groupby("Product")["Inventory_After"].min().sort_values()
-               if not reorder.empty:
-                   st.dataframe(reorder.reset_index())
+           with span("dashboard.performers"):
+               st.subheader("🏅 High/Low Performers")
+               try:
+                   perf = cube.by("Product", "Profit", how="mean").sort_values()
+                   low_performers = perf.head(3).index.tolist()
+                   high_performers = perf.tail(3).index.tolist()
+                   st.write("Low Performers:", low_performers)
+                   st.write("High Performers:", high_performers)
+               except Exception as e:
+                   st.warning(f"Error rendering performers: {e}")
+
+           with span("dashboard.reorder"):
+               st.subheader("🛒 Auto Reorder Suggestions")
+               if not alerts.reorder.empty:
+                   st.dataframe(alerts.reorder)
                    st.write("Suggestion: Reorder these products.")
                else:
                    st.write("No reorder suggestions needed.")
-           except Exception as e:
-               st.warning(f"Error rendering reorder suggestions: {e}")
 
-           st.subheader("⏳ Stock Expiry Risk Model")
-           if "Expiry Date" in df.columns:
-               try:
-                   risk = df[df["Expiry Date"] <= pd.Timestamp("2025-07-21") + pd.Timedelta(days=90)]
-                   if not risk.empty:
-                       st.dataframe(risk[["Product", "Expiry Date", "Inventory_After"]])
+           with span("dashboard.expiry_risk"):
+               st.subheader("⏳ Stock Expiry Risk Model")
+               if "Expiry Date" in df.columns:
+                   if not alerts.expiry_risk.empty:
+                       st.dataframe(alerts.expiry_risk)
                        st.warning("High expiry risk detected!")
                    else:
                        st.write("No high expiry risk.")
-               except Exception as e:
-                   st.warning(f"Error rendering expiry risk: {e}")
\ No newline at end of file
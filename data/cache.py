@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# Bump when the on-disk layout changes; normalization changes are covered by
+# the schema stamp the store passes in
+CACHE_FORMAT_VERSION = 1
+CACHE_METADATA_KEY = b"bizbuddy"
+
+
+def default_cache_dir():
+    return os.getenv("BIZBUDDY_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "bizbuddy"))
+
+
+def cache_path(cache_dir, name):
+    return os.path.join(cache_dir, f"{name}.arrow")
+
+
+def write_cache(cache_dir, name, frame, meta):
+    os.makedirs(cache_dir, exist_ok=True)
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    stamp = dict(meta, format=CACHE_FORMAT_VERSION)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        CACHE_METADATA_KEY: json.dumps(stamp).encode(),
+    })
+    # Write beside the target and rename so readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, cache_path(cache_dir, name))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_cache(cache_dir, name, expected):
+    # Returns (frame, meta, mtime) or None when missing or stamped differently
+    path = cache_path(cache_dir, name)
+    if not os.path.exists(path):
+        return None
+    source = pa.memory_map(path, "r")
+    table = pa.ipc.open_file(source).read_all()
+    raw = (table.schema.metadata or {}).get(CACHE_METADATA_KEY)
+    meta = json.loads(raw) if raw else {}
+    if meta.get("format") != CACHE_FORMAT_VERSION:
+        return None
+    if any(meta.get(key) != value for key, value in expected.items()):
+        return None
+    # split_blocks lets null-free numeric columns stay backed by the mapped pages
+    return table.to_pandas(split_blocks=True), meta, os.path.getmtime(path)
@@ -0,0 +1,123 @@
+import io
+import zlib
+from dataclasses import dataclass
+
+import pandas as pd
+
+from analytics.caching import VersionedCache
+from data.frame import prepare_frame
+from data.sources import load_rows, pushdown_source
+
+CHUNK_ROWS = 100_000
+
+# format -> (file extension, mime type)
+FORMATS = {
+    "csv.gz": (".csv.gz", "application/gzip"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "csv": (".csv", "text/csv"),
+}
+
+
+@dataclass(frozen=True)
+class ExportFilter:
+    # Hashable, so it can be part of the export cache key
+    start: pd.Timestamp = None
+    end: pd.Timestamp = None
+    locations: tuple = ()
+    products: tuple = ()
+
+    def apply(self, df):
+        mask = pd.Series(True, index=df.index)
+        if self.start is not None:
+            mask &= df["Date"] >= pd.Timestamp(self.start)
+        if self.end is not None:
+            # Inclusive of the whole end day
+            mask &= df["Date"] < pd.Timestamp(self.end) + pd.Timedelta(days=1)
+        if self.locations:
+            mask &= df["Location"].isin(self.locations)
+        if self.products:
+            mask &= df["Product"].isin(self.products)
+        return df if mask.all() else df[mask]
+
+    def pushdown(self):
+        # (filters, start, end) in the form DataSource.rows takes
+        filters = {col: values for col, values in [("Location", self.locations), ("Product", self.products)] if values}
+        start = None if self.start is None else pd.Timestamp(self.start)
+        end = None if self.end is None else pd.Timestamp(self.end)
+        return filters, start, end
+
+
+def export_rows(df, filters=None):
+    """The rows to export. Pushdown sources filter in their own engine and
+    return only the matching rows, which are not kept after the export;
+    other frames are filtered in pandas."""
+    source = pushdown_source(df) if df.attrs.get("dataset_lazy") else None
+    if source is None:
+        rows = load_rows(df)
+        return rows if filters is None else filters.apply(rows)
+    return prepare_frame(source.rows(*(filters or ExportFilter()).pushdown()))
+
+
+def _chunks(df, chunk_rows):
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def iter_csv(df, chunk_rows=CHUNK_ROWS, compress=True):
+    # Serializes and gzips one slice at a time, so the full uncompressed CSV
+    # text never exists in memory
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    for i, chunk in enumerate(_chunks(df, chunk_rows)):
+        data = chunk.to_csv(index=False, header=i == 0).encode()
+        data = compressor.compress(data) if compressor else data
+        if data:
+            yield data
+    if compressor:
+        yield compressor.flush()
+
+
+def iter_parquet(df, chunk_rows=CHUNK_ROWS):
+    # One row group per slice; the bytes written so far are handed out after each
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = io.BytesIO()
+    writer = None
+    for chunk in _chunks(df, chunk_rows):
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema, compression="zstd")
+        writer.write_table(table)
+        yield _drain(sink)
+    writer.close()
+    yield _drain(sink)
+
+
+def _drain(sink):
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+def iter_export(df, fmt="csv.gz", filters=None, chunk_rows=CHUNK_ROWS):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    df = export_rows(df, filters)
+    if fmt == "parquet":
+        return iter_parquet(df, chunk_rows)
+    return iter_csv(df, chunk_rows, compress=fmt == "csv.gz")
+
+
+_exports = VersionedCache(max_entries=4, name="exports")
+
+
+def get_export(df, fmt="csv.gz", filters=None):
+    """Export bytes for one dataset version, format and filter.
+
+    Generated on first request and cached, so repeated downloads (and other
+    sessions asking for the same slice) don't serialize the data again.
+    """
+    version = df.attrs.get("dataset_version")
+    key = None if version is None else (version, fmt, filters)
+    return _exports.get_or_compute(key, lambda: b"".join(iter_export(df, fmt, filters)))
@@ -0,0 +1,70 @@
+import pandas as pd
+
+# Normalization rules shared by every view
+COLUMN_RENAMES = {
+    "Sale Date": "Date",
+    "Order Date": "Date",
+    "Product_Expiry_Date": "Expiry Date",
+}
+DATE_COLUMNS = ["Date", "Expiry Date"]
+NUMERIC_COLUMNS = ["Revenue", "Units_Sold", "Inventory_After", "Unit_Price", "Cost_Price", "Profit"]
+CATEGORY_COLUMNS = ["Product", "Location", "Platform"]
+REQUIRED_COLUMNS = ["Date", "Product", "Revenue", "Units_Sold", "Inventory_After", "Location"]
+
+
+def enable_copy_on_write():
+    """Turn on pandas copy-on-write for this process (the default from 3.0 on).
+
+    Slices and shallow copies of the shared frame then become lazy views, so
+    a session can add or overwrite columns without touching the frame other
+    sessions read. It changes chained-assignment semantics process-wide, so
+    it is switched on by the entry points (main.py, the batch CLI, the
+    benchmarks and the sandbox worker), never by importing a module.
+    """
+    pd.set_option("mode.copy_on_write", True)
+
+
+def normalize_frame(df):
+    renames = {old: new for old, new in COLUMN_RENAMES.items() if old in df.columns and new not in df.columns}
+    if renames:
+        df = df.rename(columns=renames)
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def compact_frame(df):
+    # Categoricals for the low-cardinality keys only. Measures stay int64 /
+    # float64: narrower types overflow in arithmetic and drift in sums
+    columns = {}
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            columns[col] = df[col].astype("category")
+    return df.assign(**columns) if columns else df
+
+
+def prepare_frame(df):
+    return compact_frame(normalize_frame(df))
+
+
+def is_prepared(df):
+    for col in DATE_COLUMNS:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            return False
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+            return False
+    return True
+
+
+def ensure_prepared(df):
+    # Store frames pass straight through; anything else is prepared on a view
+    return df if is_prepared(df) else prepare_frame(df.copy(deep=False))
+
+
+def missing_columns(df, columns=REQUIRED_COLUMNS):
+    return [col for col in columns if col not in df.columns]
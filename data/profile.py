@@ -0,0 +1,61 @@
+import pandas as pd
+
+from analytics.caching import VersionedCache
+from data.sources import load_rows
+
+TOP_CATEGORIES = 5
+MAX_LISTED_CATEGORIES = 12
+
+
+def _number(value):
+    if pd.isna(value):
+        return "n/a"
+    return f"{value:,.0f}" if float(value).is_integer() else f"{value:,.2f}"
+
+
+def build_profile(df):
+    columns, rows = [], len(df)
+    for name in df.columns:
+        # One column at a time, so a pushdown source never loads every row at once
+        series = load_rows(df, [name])[name]
+        rows = len(series)
+        column = {"name": name, "dtype": str(series.dtype), "nulls": int(series.isna().sum())}
+        if pd.api.types.is_datetime64_any_dtype(series):
+            column.update(kind="date", min=series.min(), max=series.max())
+        elif pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+            counts = series.value_counts()
+            counts = counts[counts > 0]
+            column.update(kind="category", distinct=len(counts),
+                          top=list(counts.head(TOP_CATEGORIES).items()),
+                          values=list(counts.index[:MAX_LISTED_CATEGORIES]) if len(counts) <= MAX_LISTED_CATEGORIES else None)
+        else:
+            column.update(kind="number", min=series.min(), max=series.max(), mean=series.mean())
+        columns.append(column)
+    return {"rows": rows, "columns": columns}
+
+
+def format_profile(profile):
+    lines = [f"`df` has {profile['rows']:,} rows. Columns:"]
+    for column in profile["columns"]:
+        nulls = f", {column['nulls']:,} nulls" if column["nulls"] else ""
+        if column["kind"] == "date":
+            span = f"{column['min']:%Y-%m-%d} to {column['max']:%Y-%m-%d}" if pd.notna(column["min"]) else "no dates"
+            detail = span
+        elif column["kind"] == "category":
+            if column["values"] is not None:
+                detail = f"values: {', '.join(map(str, column['values']))}"
+            else:
+                top = ", ".join(f"{value} ({count:,})" for value, count in column["top"])
+                detail = f"{column['distinct']:,} distinct; most common: {top}"
+        else:
+            detail = f"min {_number(column['min'])}, max {_number(column['max'])}, mean {_number(column['mean'])}"
+        lines.append(f"- {column['name']} ({column['dtype']}{nulls}): {detail}")
+    return "\n".join(lines)
+
+
+_profiles = VersionedCache(max_entries=8, name="profiles")
+
+
+def get_profile_text(df):
+    # One profile per dataset version; it replaces raw sample rows in the prompt
+    return _profiles.get_or_compute(df.attrs.get("dataset_version"), lambda: format_profile(build_profile(df)))
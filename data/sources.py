@@ -0,0 +1,337 @@
+import hashlib
+import io
+import os
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from analytics.caching import VersionedCache
+from data.frame import COLUMN_RENAMES, prepare_frame
+
+AGGREGATIONS = {"sum": "SUM", "mean": "AVG", "min": "MIN", "max": "MAX", "count": "COUNT"}
+
+
+def _file_validator(path):
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def _normalized_names(raw_columns):
+    # Same renames normalize_frame applies, so pushed-down queries can use the
+    # app's column names whatever the source calls them
+    names = {column: column for column in raw_columns}
+    for old, new in COLUMN_RENAMES.items():
+        if old in names and new not in names:
+            names[new] = names.pop(old)
+    return names
+
+
+class DataSource:
+    """Where a dataset's rows come from.
+
+    ``fetch`` does the cheap change check and returns ``(payload, etag,
+    last_modified)`` with payload None when nothing changed; ``version`` and
+    ``load`` turn a payload into a content version and a raw dataframe.
+    Sources with ``pushdown = True`` can also answer aggregations in their
+    own engine (``aggregate_cells`` / ``aggregate`` / ``latest``), read
+    just some columns (``frame``) or just the matching rows (``rows``), so
+    the store never loads their rows up front; ``schema`` gives the empty
+    frame it keeps instead. Filters map a column to one value, or to a tuple
+    or list of accepted values.
+    """
+
+    pushdown = False
+
+    def __init__(self, location):
+        self.location = location
+
+    def fetch(self, etag=None, last_modified=None):
+        raise NotImplementedError
+
+    def version(self, payload):
+        return hashlib.sha256(f"{self.location}|{payload}".encode()).hexdigest()[:16]
+
+    def load(self, payload):
+        raise NotImplementedError
+
+
+class CSVSource(DataSource):
+    # Google Sheets CSV exports and local CSV files; rows are parsed in pandas
+    def __init__(self, location, fetch):
+        super().__init__(location)
+        self._fetch = fetch
+
+    def fetch(self, etag=None, last_modified=None):
+        return self._fetch(self.location, etag, last_modified)
+
+    def version(self, payload):
+        return hashlib.sha256(payload).hexdigest()[:16]
+
+    def load(self, payload):
+        return pd.read_csv(io.BytesIO(payload))
+
+
+class ParquetSource(DataSource):
+    """Local Parquet file. Aggregations read only the columns they need and
+    filters are pushed into the scan, so row groups that can't match are
+    skipped."""
+
+    pushdown = True
+
+    def __init__(self, location):
+        super().__init__(location)
+        self.path = location
+
+    def fetch(self, etag=None, last_modified=None):
+        validator = _file_validator(self.path)
+        return (None if validator == etag else validator), validator, None
+
+    def load(self, payload):
+        return pd.read_parquet(self.path)
+
+    def schema(self):
+        return self._dataset().schema.empty_table().to_pandas()
+
+    def frame(self, columns):
+        return self._table(columns).to_pandas()
+
+    def latest(self, keys, columns, not_null=()):
+        # The last row per key by date; only the needed columns are read
+        frame = self.frame(list(dict.fromkeys([*keys, *columns, "Date"])))
+        if not_null:
+            frame = frame.dropna(subset=list(not_null))
+        frame = frame.sort_values("Date", kind="stable").drop_duplicates(keys, keep="last")
+        return frame[columns].reset_index(drop=True)
+
+    def _dataset(self):
+        import pyarrow.dataset as ds
+        return ds.dataset(self.path, format="parquet")
+
+    def columns(self):
+        return _normalized_names(self._dataset().schema.names)
+
+    def rows(self, filters=None, start=None, end=None):
+        # Every column of the matching rows, under the source's own names like load()
+        dataset = self._dataset()
+        return dataset.to_table(filter=self._expression(dataset, self.columns(), filters, start, end)).to_pandas()
+
+    def _expression(self, dataset, names, filters=None, start=None, end=None):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        expression = None
+        conditions = [ds.field(names[col]).isin(list(value)) if isinstance(value, (tuple, list))
+                      else ds.field(names[col]) == value for col, value in (filters or {}).items()]
+        if start is not None or end is not None:
+            date = ds.field(names["Date"])
+            as_text = pa.types.is_string(dataset.schema.field(names["Date"]).type)
+
+            def bound(ts):
+                return ts.strftime("%Y-%m-%d") if as_text else pa.scalar(ts.to_pydatetime(), pa.timestamp("us"))
+            if start is not None:
+                conditions.append(date >= bound(start))
+            if end is not None:
+                conditions.append(date < bound(end + pd.Timedelta(days=1)))
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def _table(self, columns, filters=None, start=None, end=None):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        dataset, names = self._dataset(), self.columns()
+        expression = self._expression(dataset, names, filters, start, end)
+        table = dataset.to_table(columns=[names[col] for col in columns], filter=expression)
+        table = table.rename_columns(columns)
+        if "Date" in columns and not pa.types.is_timestamp(table.schema.field("Date").type):
+            table = table.set_column(table.schema.get_field_index("Date"), "Date",
+                                     pc.cast(table["Date"], pa.timestamp("us")))
+        return table
+
+    def aggregate_cells(self, dimensions, sums, mins):
+        import pyarrow.compute as pc
+
+        names = self.columns()
+        keys = [dim for dim in dimensions if dim in names and dim != "Month"]
+        sums = [col for col in sums if col in names]
+        mins = [col for col in mins if col in names]
+        with_month = "Month" in dimensions and "Date" in names
+        table = self._table(list(dict.fromkeys(keys + sums + mins + (["Date"] if with_month else []))))
+        if with_month:
+            table = table.append_column("Month", pc.strftime(table["Date"], format="%Y-%m"))
+            keys.append("Month")
+        aggregations = [([], "count_all")] + [(col, "sum") for col in sums] + [(col, "count") for col in sums]
+        aggregations += [(col, "min") for col in mins]
+        cells = table.group_by(keys).aggregate(aggregations).to_pandas()
+        return cells.rename(columns={"count_all": "rows"})
+
+    def aggregate(self, metric, by=None, filters=None, start=None, end=None, how="sum"):
+        columns = list(dict.fromkeys([metric, *([by] if by else []), *(filters or {})]))
+        frame = self._table(columns, filters, start, end).to_pandas()
+        if by:
+            return frame.groupby(by, observed=True)[metric].agg(how)
+        return frame[metric].agg(how)
+
+
+class SQLSource(DataSource):
+    """A table in an embedded SQL engine: SQLite (standard library) or DuckDB.
+
+    ``sqlite:///relative.db?table=sales`` or ``sqlite:////abs/path.db?table=sales``
+    (SQLAlchemy-style), and the same with ``duckdb://``. Filters and
+    aggregations run as SQL, so the engine can work on tables larger than
+    memory.
+    """
+
+    pushdown = True
+
+    def __init__(self, location):
+        super().__init__(location)
+        parts = urlsplit(location)
+        self.engine = parts.scheme
+        self.path = parts.path[1:] if parts.path.startswith("/") else parts.path
+        self.table = parse_qs(parts.query).get("table", ["sales"])[0]
+
+    def _connect(self):
+        # A short-lived read-only connection per call keeps this thread-safe
+        if self.engine == "duckdb":
+            import duckdb
+            return duckdb.connect(self.path, read_only=True)
+        import sqlite3
+        return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+
+    def _query(self, sql, params=()):
+        connection = self._connect()
+        try:
+            if self.engine == "duckdb":
+                return connection.execute(sql, list(params)).df()
+            return pd.read_sql_query(sql, connection, params=params)
+        finally:
+            connection.close()
+
+    def fetch(self, etag=None, last_modified=None):
+        validator = _file_validator(self.path)
+        return (None if validator == etag else validator), validator, None
+
+    def load(self, payload):
+        return self._query(f"SELECT * FROM {_quote(self.table)}")
+
+    def schema(self):
+        return self._query(f"SELECT * FROM {_quote(self.table)} LIMIT 0")
+
+    def _select(self, names, columns):
+        return ", ".join(f"{_quote(names[col])} AS {_quote(col)}" for col in columns)
+
+    def frame(self, columns):
+        return self._query(f"SELECT {self._select(self.columns(), columns)} FROM {_quote(self.table)}")
+
+    def rows(self, filters=None, start=None, end=None):
+        where, params = self._where(self.columns(), filters, start, end)
+        return self._query(f"SELECT * FROM {_quote(self.table)}{where}", params)
+
+    def latest(self, keys, columns, not_null=()):
+        # The last row per key by date, picked by a window function in the engine
+        names = self.columns()
+        where = " AND ".join(f"{_quote(names[col])} IS NOT NULL" for col in not_null)
+        return self._query(
+            f"SELECT {', '.join(map(_quote, columns))} FROM (SELECT {self._select(names, columns)}, "
+            f"ROW_NUMBER() OVER (PARTITION BY {', '.join(_quote(names[key]) for key in keys)} "
+            f"ORDER BY {_quote(names['Date'])} DESC) AS _latest FROM {_quote(self.table)}"
+            f"{' WHERE ' + where if where else ''}) AS ranked WHERE _latest = 1"
+        )
+
+    def columns(self):
+        return _normalized_names(self._query(f"SELECT * FROM {_quote(self.table)} LIMIT 0").columns)
+
+    def _month(self, column):
+        if self.engine == "duckdb":
+            return f"strftime(TRY_CAST({column} AS DATE), '%Y-%m')"
+        return f"strftime('%Y-%m', {column})"
+
+    def _where(self, names, filters=None, start=None, end=None):
+        conditions, params = [], []
+        for col, value in (filters or {}).items():
+            if isinstance(value, (tuple, list)):
+                conditions.append(f"{_quote(names[col])} IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                conditions.append(f"{_quote(names[col])} = ?")
+                params.append(value)
+        if start is not None:
+            conditions.append(f"{_quote(names['Date'])} >= ?")
+            params.append(start.strftime("%Y-%m-%d"))
+        if end is not None:
+            conditions.append(f"{_quote(names['Date'])} < ?")
+            params.append((end + pd.Timedelta(days=1)).strftime("%Y-%m-%d"))
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def aggregate_cells(self, dimensions, sums, mins):
+        names = self.columns()
+        keys = [f"{_quote(names[dim])} AS {_quote(dim)}" for dim in dimensions if dim in names and dim != "Month"]
+        if "Month" in dimensions and "Date" in names:
+            keys.append(f"{self._month(_quote(names['Date']))} AS \"Month\"")
+        values = ["COUNT(*) AS \"rows\""]
+        values += [f"SUM({_quote(names[col])}) AS {_quote(col + '_sum')}" for col in sums if col in names]
+        values += [f"COUNT({_quote(names[col])}) AS {_quote(col + '_count')}" for col in sums if col in names]
+        values += [f"MIN({_quote(names[col])}) AS {_quote(col + '_min')}" for col in mins if col in names]
+        group = f" GROUP BY {', '.join(str(i) for i in range(1, len(keys) + 1))}" if keys else ""
+        return self._query(f"SELECT {', '.join(keys + values)} FROM {_quote(self.table)}{group}")
+
+    def aggregate(self, metric, by=None, filters=None, start=None, end=None, how="sum"):
+        names = self.columns()
+        where, params = self._where(names, filters, start, end)
+        value = f"{AGGREGATIONS[how]}({_quote(names[metric])})"
+        if by:
+            frame = self._query(f"SELECT {_quote(names[by])} AS key, {value} AS value FROM {_quote(self.table)}"
+                                f"{where} GROUP BY 1", params)
+            return frame.set_index("key")["value"].rename_axis(by).rename(metric)
+        return self._query(f"SELECT {value} AS value FROM {_quote(self.table)}{where}", params)["value"].iloc[0]
+
+
+def _quote(identifier):
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def source_for(location, fetch=None):
+    scheme = urlsplit(location).scheme
+    if scheme in ("sqlite", "duckdb"):
+        return SQLSource(location)
+    if scheme not in ("http", "https") and location.lower().endswith((".parquet", ".pq")):
+        return ParquetSource(location)
+    if fetch is None:
+        from data.store import _fetch as fetch
+    return CSVSource(location, fetch)
+
+
+def pushdown_source(df):
+    # The frame's own source, when it can run aggregations in its engine
+    location = df.attrs.get("dataset_source")
+    if not location:
+        return None
+    source = source_for(location)
+    return source if source.pushdown else None
+
+
+_rows = VersionedCache(max_entries=2, name="rows")
+
+
+def load_rows(df, columns=None):
+    """The rows behind ``df`` (or just ``columns`` of them).
+
+    Store snapshots of pushdown sources hold only their schema; the agent's
+    Python tool, exports and anomaly scoring call this to read the rows from
+    the source on first use, once per dataset version. Other frames are
+    returned as they are.
+    """
+    if not df.attrs.get("dataset_lazy"):
+        return df if columns is None else df[columns]
+    version = df.attrs.get("dataset_version")
+    key = None if version is None else (version, tuple(columns) if columns else None)
+
+    def load():
+        source = source_for(df.attrs["dataset_source"])
+        frame = prepare_frame(source.load(None) if columns is None else source.frame(columns))
+        frame.attrs.update(df.attrs, dataset_lazy=False)
+        return frame
+
+    return _rows.get_or_compute(key, load).copy(deep=False)
@@ -0,0 +1,205 @@
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+import requests
+
+from data.cache import default_cache_dir, read_cache, write_cache
+from data.frame import CATEGORY_COLUMNS, COLUMN_RENAMES, DATE_COLUMNS, NUMERIC_COLUMNS, prepare_frame
+from data.sources import source_for
+
+# Known datasets
+SALES_SHEET_URL = "https://docs.google.com/spreadsheets/d/1ktXvN1Y7HTVkM0WQhuEV8nyk8_NfWSi_7v2rSphbaN4/export?format=csv"
+PHARMACY_SHEET_URL = "https://docs.google.com/spreadsheets/d/1ISS7IQOMPrAEqU7lnpJYM5W2zd4oynntnmMTiokiVNU/export?format=csv"
+
+DEFAULT_DATASET = "pharmacy"
+# Any location data.sources understands: a sheet URL, a local .csv/.parquet
+# file, or sqlite:///path.db?table=sales / duckdb:///path.duckdb?table=sales.
+# BIZBUDDY_DATA_SOURCE points the default dataset elsewhere (e.g. air-gapped hosts)
+DATASETS = {
+    "sales": SALES_SHEET_URL,
+    "pharmacy": PHARMACY_SHEET_URL,
+}
+if os.getenv("BIZBUDDY_DATA_SOURCE"):
+    DATASETS[DEFAULT_DATASET] = os.getenv("BIZBUDDY_DATA_SOURCE")
+DEFAULT_TTL = 60
+
+# Stamped into the on-disk cache so a change to the preparation rules rebuilds it
+SCHEMA_STAMP = hashlib.sha256(
+    repr((sorted(COLUMN_RENAMES.items()), DATE_COLUMNS, NUMERIC_COLUMNS, CATEGORY_COLUMNS, "compact-2")).encode()
+).hexdigest()[:12]
+
+
+@dataclass(frozen=True)
+class DatasetSnapshot:
+    name: str
+    version: str
+    frame: pd.DataFrame
+    loaded_at: float = field(default_factory=time.time)
+    source: str = None
+    # Pushdown sources: ``frame`` is the schema only, rows come from load_rows
+    lazy: bool = False
+
+    def __post_init__(self):
+        # Lets downstream caches (aggregates, models) key on the data version,
+        # and pushdown-capable consumers find the engine behind the frame
+        self.frame.attrs["dataset_name"] = self.name
+        self.frame.attrs["dataset_version"] = self.version
+        self.frame.attrs["dataset_source"] = self.source
+        self.frame.attrs["dataset_lazy"] = self.lazy
+
+    def view(self, columns=None):
+        # Copy-on-write view (see data.frame.enable_copy_on_write): callers may
+        # add or overwrite columns freely, the shared frame stays untouched
+        return self.frame[columns] if columns else self.frame.copy(deep=False)
+
+
+@dataclass
+class _Entry:
+    snapshot: DatasetSnapshot = None
+    etag: str = None
+    last_modified: str = None
+    checked_at: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+def _fetch(location, etag=None, last_modified=None):
+    # Returns (body, etag, last_modified); body is None when the source is unchanged
+    if os.path.exists(location):
+        stat = os.stat(location)
+        validator = f"{stat.st_mtime_ns}-{stat.st_size}"
+        if validator == etag:
+            return None, etag, last_modified
+        with open(location, "rb") as f:
+            return f.read(), validator, None
+
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    response = requests.get(location, headers=headers, timeout=30)
+    if response.status_code == 304:
+        return None, etag, last_modified
+    response.raise_for_status()
+    return response.content, response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+
+class DatasetStore:
+    def __init__(self, datasets=None, ttl=DEFAULT_TTL, fetch=_fetch, cache_dir=None):
+        self.datasets = dict(DATASETS if datasets is None else datasets)
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self._fetch = fetch
+        self._entries = {}
+        self._sources = {}
+        self._lock = threading.Lock()
+        self.parse_count = 0
+
+    def _entry(self, name):
+        if name not in self.datasets:
+            raise KeyError(f"Unknown dataset: {name}")
+        with self._lock:
+            return self._entries.setdefault(name, _Entry())
+
+    def source(self, name):
+        with self._lock:
+            if name not in self._sources:
+                self._sources[name] = source_for(self.datasets[name], fetch=self._fetch)
+            return self._sources[name]
+
+    def _cache_stamp(self, name):
+        return {"schema": SCHEMA_STAMP, "source": self.datasets[name]}
+
+    def _load_cached(self, name, entry):
+        if self.source(name).pushdown:
+            return
+        try:
+            cached = read_cache(self.cache_dir, name, self._cache_stamp(name))
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable cache for {name}: {e}")
+            return
+        if cached is None:
+            return
+        frame, meta, written_at = cached
+        entry.snapshot = DatasetSnapshot(name=name, version=meta["version"], frame=frame, loaded_at=written_at,
+                                         source=self.datasets[name])
+        entry.etag, entry.last_modified = meta.get("etag"), meta.get("last_modified")
+        # A cache written recently by another worker counts as a fresh check
+        entry.checked_at = written_at
+
+    def _store_cached(self, name, entry):
+        meta = dict(self._cache_stamp(name), version=entry.snapshot.version,
+                    etag=entry.etag, last_modified=entry.last_modified)
+        try:
+            write_cache(self.cache_dir, name, entry.snapshot.frame, meta)
+        except Exception as e:
+            print(f"⚠️ Could not write cache for {name}: {e}")
+
+    def get(self, name=DEFAULT_DATASET):
+        entry = self._entry(name)
+        if entry.snapshot is not None and time.time() - entry.checked_at < self.ttl:
+            return entry.snapshot
+        return self.refresh(name)
+
+    def refresh(self, name=DEFAULT_DATASET, force=False):
+        entry = self._entry(name)
+        with entry.lock:
+            if entry.snapshot is None and self.cache_dir and not force:
+                self._load_cached(name, entry)
+
+            # Another session may have refreshed while we waited on the lock
+            if not force and entry.snapshot is not None and time.time() - entry.checked_at < self.ttl:
+                return entry.snapshot
+
+            etag, last_modified = (None, None) if force else (entry.etag, entry.last_modified)
+            source = self.source(name)
+            payload, etag, last_modified = source.fetch(etag, last_modified)
+            entry.checked_at = time.time()
+            validators_changed = (etag, last_modified) != (entry.etag, entry.last_modified)
+            entry.etag, entry.last_modified = etag, last_modified
+            if payload is None and entry.snapshot is not None:
+                return entry.snapshot
+
+            version = source.version(payload)
+            if entry.snapshot is not None and entry.snapshot.version == version:
+                if validators_changed and self.cache_dir and not entry.snapshot.lazy:
+                    self._store_cached(name, entry)
+                return entry.snapshot
+
+            # Pushdown sources keep their rows in the engine: the snapshot holds
+            # the schema, aggregates run in the source, rows load on demand
+            lazy = source.pushdown
+            frame = prepare_frame(source.schema() if lazy else source.load(payload))
+            self.parse_count += 1
+            entry.snapshot = DatasetSnapshot(name=name, version=version, frame=frame, source=self.datasets[name],
+                                             lazy=lazy)
+            if self.cache_dir and not lazy:
+                self._store_cached(name, entry)
+            return entry.snapshot
+
+    def invalidate(self, name=None):
+        with self._lock:
+            names = [name] if name else list(self._entries)
+            for key in names:
+                if key in self._entries:
+                    self._entries[key].checked_at = 0.0
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DatasetStore(cache_dir=default_cache_dir())
+        return _store
+
+
+def load_dataset(name=DEFAULT_DATASET):
+    return get_store().get(name)
@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from analytics.caching import evict_dataset, evict_version
+from data.cache import default_cache_dir
+from data.store import DATASETS, DEFAULT_DATASET, DEFAULT_TTL, DatasetStore
+
+TENANT_MEMORY_MB = int(os.getenv("BIZBUDDY_TENANT_MEMORY_MB", "1024"))
+
+
+def load_tenants(path=None):
+    """Tenant name -> dataset location (anything data.sources understands).
+
+    Read from the JSON file named by BIZBUDDY_TENANTS; without one, the
+    app's default dataset is the only tenant.
+    """
+    path = path or os.getenv("BIZBUDDY_TENANTS")
+    if not path:
+        return {DEFAULT_DATASET: DATASETS[DEFAULT_DATASET]}
+    with open(path) as f:
+        return json.load(f)
+
+
+def snapshot_bytes(snapshot):
+    return int(snapshot.frame.memory_usage(deep=True).sum())
+
+
+class TenantRegistry:
+    """Many stores' datasets in one process, within a memory budget.
+
+    Each tenant gets its own DatasetStore, loaded on first use. Resident
+    tenants are kept in LRU order; when their frames exceed
+    ``memory_budget`` bytes the least recently used ones are evicted, along
+    with everything derived from their data version in the shared caches
+    (cubes, routers, alert engines, agent templates, sandbox pools) and their
+    in-memory anomaly model. The LLM client and imported libraries stay
+    shared by every tenant, and an evicted tenant comes back quickly from the
+    on-disk Arrow and model caches.
+    """
+
+    def __init__(self, tenants=None, memory_budget=TENANT_MEMORY_MB * 1024 * 1024, ttl=DEFAULT_TTL,
+                 cache_dir=None, store_factory=None):
+        self.tenants = dict(load_tenants() if tenants is None else tenants)
+        self.memory_budget = memory_budget
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self._store_factory = store_factory or (
+            lambda name, location: DatasetStore({name: location}, ttl=self.ttl, cache_dir=self.cache_dir)
+        )
+        self._resident = OrderedDict()  # tenant -> (store, bytes, version)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    @property
+    def default(self):
+        return DEFAULT_DATASET if DEFAULT_DATASET in self.tenants else next(iter(self.tenants))
+
+    def names(self):
+        return list(self.tenants)
+
+    def get(self, tenant=None, touch=True):
+        """The tenant's current snapshot, loading the tenant if needed.
+
+        With ``touch=False`` (background readers) the tenant keeps its LRU
+        position, and None is returned if it isn't resident.
+        """
+        tenant = tenant or self.default
+        if tenant not in self.tenants:
+            raise KeyError(f"Unknown tenant: {tenant}")
+        with self._lock:
+            resident = self._resident.get(tenant)
+            if resident is None and not touch:
+                return None
+            store = resident[0] if resident else self._store_factory(tenant, self.tenants[tenant])
+            self._resident[tenant] = resident or (store, 0, None)
+            if touch:
+                self._resident.move_to_end(tenant)
+
+        # Loading happens outside the registry lock so one slow tenant doesn't
+        # block the others; the store has its own per-dataset lock
+        snapshot = store.get(tenant)
+        with self._lock:
+            if tenant in self._resident:
+                _, used, previous = self._resident[tenant]
+                if previous != snapshot.version:
+                    # Deep memory_usage scans every string; measure once per version
+                    used = snapshot_bytes(snapshot)
+                    if previous is not None:
+                        evict_version(previous)
+                self._resident[tenant] = (store, used, snapshot.version)
+            evicted = self._over_budget(keep=tenant)
+        for name, version in evicted:
+            _drop(name, version)
+        return snapshot
+
+    def _over_budget(self, keep):
+        evicted = []
+        while sum(used for _, used, _ in self._resident.values()) > self.memory_budget:
+            victim = next((name for name in self._resident if name != keep), None)
+            if victim is None:
+                break
+            _, _, version = self._resident.pop(victim)
+            evicted.append((victim, version))
+            self.evictions += 1
+        return evicted
+
+    def evict(self, tenant):
+        with self._lock:
+            resident = self._resident.pop(tenant, None)
+        if resident is not None:
+            _drop(tenant, resident[2])
+
+    def usage(self):
+        with self._lock:
+            return {name: used for name, (_, used, _) in self._resident.items()}
+
+
+def _drop(tenant, version):
+    if version is not None:
+        evict_version(version)
+    evict_dataset(tenant)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TenantRegistry(cache_dir=default_cache_dir())
+        return _registry
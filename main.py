@@ -1,5 +1,4 @@
 import streamlit as st
-import pandas as pd
 import os
 import sys
 from dotenv import load_dotenv
@@ -9,26 +8,51 @@ from pydantic import ValidationError
 st.set_page_config(page_title="BizBuddy AI", page_icon="🧠", layout="wide")
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
+# Views of the shared dataset are copy-on-write for every session
+from data.frame import enable_copy_on_write
+enable_copy_on_write()
+
 # Load environment variables
 load_dotenv()
 os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
 
-# Load agent
-from agent.agent import load_agent
-agent = load_agent()
+# Tracing: spans from this rerun feed the admin panel and the metrics export
+from analytics.tracing import span, traced, tracer
+tracer.begin_rerun()
+
+# Tenant: ?tenant=<store> in the URL, or picked in the sidebar when this
+# process hosts several stores (BIZBUDDY_TENANTS)
+from data.tenants import get_registry
+registry = get_registry()
+tenant = st.query_params.get("tenant")
+if tenant not in registry.tenants:
+    tenants = registry.names()
+    tenant = st.sidebar.selectbox("🏪 Store", tenants, index=tenants.index(registry.default)) if len(tenants) > 1 else registry.default
+if st.session_state.get("tenant") != tenant:
+    # Switching stores starts a fresh conversation
+    st.session_state["tenant"] = tenant
+    st.session_state.chat_history = []
 
-# Load dataset
-@st.cache_data(ttl=60)
+# Load dataset (tenant registry: parsed once, revalidated every 60s, evicted
+# least recently used first when the tenants outgrow the memory budget)
+@traced()
 def load_data():
-    sheet_url = "https://docs.google.com/spreadsheets/d/1ktXvN1Y7HTVkM0WQhuEV8nyk8_NfWSi_7v2rSphbaN4/export?format=csv"
-    df = pd.read_csv(sheet_url)
-    # Rename Sale Date to Date if it exists
-    if "Sale Date" in df.columns:
-        df.rename(columns={"Sale Date": "Date"}, inplace=True)
-    return df
+    return registry.get(tenant).view()
 
 df = load_data()
 
+# Background worker: precomputes aggregates, forecasts, anomalies and alerts
+# for each new version of every resident tenant's data, so the views below
+# only read finished results
+from analytics.scheduler import start_scheduler
+start_scheduler(registry, registry.default)
+
+# Session agent: shares the LLM client, tools and data with every other
+# session in this process; only the conversation memory is per session
+from agent.agent import get_session_agent
+with span("load_agent"):
+    agent = get_session_agent(st.session_state, df)
+
 # Import views
 from chat.streamlit_chats import chatbot_view
 from dashboard.streamlit_dashboards import dashboard_view
@@ -43,6 +67,15 @@ page = st.sidebar.radio("Go to:", ["💬 Chatbot", "📊 Dashboard"])
 
 # View rendering
 if page == "💬 Chatbot":
-   chatbot_view(agent)
+   with span("chatbot_view"):
+      chatbot_view(agent, df)
 elif page == "📊 Dashboard":
-   dashboard_view(df)
+   with span("dashboard_view"):
+      dashboard_view(df)
+
+# Optional admin panel (BIZBUDDY_ADMIN=1) and Prometheus textfile export
+from dashboard.admin import ADMIN_ENABLED, admin_sidebar
+if ADMIN_ENABLED:
+   admin_sidebar()
+if os.getenv("BIZBUDDY_METRICS_FILE"):
+   tracer.write_prometheus(os.getenv("BIZBUDDY_METRICS_FILE"))
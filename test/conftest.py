@@ -0,0 +1,48 @@
+import io
+import itertools
+
+import pandas as pd
+import pytest
+
+from data.frame import enable_copy_on_write, prepare_frame
+
+# One small pharmacy sales sheet in the raw upload layout. Aspirin/North dips
+# to 5 and is restocked to 45; Insulin's batch is already past expiry in July
+SALES_CSV = (
+    "Order Date,Product,Location,Platform,Units_Sold,Unit_Price,Cost_Price,Revenue,Profit,Inventory_After,"
+    "Product_Expiry_Date\n"
+    "2025-06-01,Aspirin,North,Store,5,10,6,50,20,5,2025-08-01\n"
+    "2025-07-10,Aspirin,North,Online,2,10,6,20,8,45,2025-08-01\n"
+    "2025-06-15,Ibuprofen,South,Online,9,10,6,90,36,15,2026-01-01\n"
+    "2025-07-02,Aspirin,South,Store,7,10,6,70,28,25,2025-09-30\n"
+    "2025-07-20,Vitamin C,North,App,1,10,6,10,4,8,2025-07-30\n"
+    "2025-05-01,Insulin,South,Store,3,10,6,30,12,3,2025-07-01\n"
+)
+
+# As in the app: store views are copy-on-write
+enable_copy_on_write()
+
+# Derived artifacts are cached process-wide per dataset version, so every
+# frame handed to a test gets a version no other test uses
+_versions = itertools.count(1)
+
+
+@pytest.fixture
+def raw_sales():
+    """The sales sheet as uploaded: string dates, original column names."""
+    return pd.read_csv(io.StringIO(SALES_CSV))
+
+
+@pytest.fixture
+def sales(raw_sales):
+    """The sales sheet prepared the way the dataset store serves it."""
+    df = prepare_frame(raw_sales)
+    df.attrs["dataset_version"] = f"test-{next(_versions)}"
+    return df
+
+
+@pytest.fixture
+def sales_csv(tmp_path):
+    path = tmp_path / "sales.csv"
+    path.write_text(SALES_CSV)
+    return path
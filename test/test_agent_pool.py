@@ -0,0 +1,89 @@
+from agent.agent import build_agent
+from agent.memory import build_memory
+from agent.pool import AgentPool
+
+
+def test_sessions_share_template_but_not_memory_or_locals(sales, monkeypatch):
+    from langchain_openai import ChatOpenAI
+
+    monkeypatch.setattr("agent.sandbox.SANDBOX_ENABLED", False)
+
+    built = []
+
+    def build_llm():
+        built.append(1)
+        return ChatOpenAI(model="gpt-3.5-turbo", api_key="test")
+
+    pool = AgentPool(build_llm, build_agent, lambda llm: build_memory(llm, mode="buffer"))
+    alice, bob = {}, {}
+    a, b = pool.session_agent(alice, sales), pool.session_agent(bob, sales)
+
+    assert len(built) == 1
+    assert a.agent.runnable is b.agent.runnable
+    assert a.memory is not b.memory
+    assert a.tools[0].locals is not b.tools[0].locals
+    assert pool.session_agent(alice, sales) is a
+
+    a.memory.save_context({"input": "hi"}, {"output": "hello"})
+    pool.reset_memory(alice)
+    assert a.memory.load_memory_variables({})["chat_history"] == []
+    assert pool.session_agent(alice, sales) is a
+
+
+def test_summary_memory_stays_within_budget():
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    from agent.memory import memory_tokens
+
+    class WordCountingModel(FakeListChatModel):
+        def get_num_tokens_from_messages(self, messages):
+            return sum(len(str(m.content).split()) for m in messages)
+
+    llm = WordCountingModel(responses=["Earlier the user asked about revenue."] * 10)
+    memory = build_memory(llm, mode="summary", max_token_limit=40)
+    for turn in range(10):
+        memory.save_context({"input": f"question {turn} " * 5}, {"output": f"answer {turn} " * 5})
+
+    messages = memory.load_memory_variables({})["chat_history"]
+    assert messages[0].content == "Earlier the user asked about revenue."
+    assert "answer 9" in messages[-1].content
+    assert memory_tokens(memory, llm) <= 40 + len(messages[0].content.split())
+
+
+def test_memory_saves_the_answer_of_a_streamed_turn():
+    import warnings
+
+    memory = build_memory(None, mode="buffer")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        # Streamed runs return the intermediate messages next to the answer
+        memory.save_context({"input": "hi", "chat_history": []}, {"output": "hello", "messages": ["step"]})
+    assert [m.content for m in memory.load_memory_variables({})["chat_history"]] == ["hi", "hello"]
+
+
+def test_summarization_calls_count_toward_the_turns_usage():
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    from agent.memory import TokenUsageHandler, memory_callbacks
+
+    class WordCountingModel(FakeListChatModel):
+        def get_num_tokens_from_messages(self, messages):
+            return sum(len(str(m.content).split()) for m in messages)
+
+    memory = build_memory(WordCountingModel(responses=["A summary."] * 10), mode="summary", max_token_limit=10)
+    usage = TokenUsageHandler()
+    memory.save_context({"input": "question " * 8}, {"output": "answer " * 8})
+    assert usage.llm_calls == 0
+    with memory_callbacks(memory, [usage]):
+        memory.save_context({"input": "question " * 8}, {"output": "answer " * 8})
+    assert usage.llm_calls >= 1 and memory.callbacks is None
+
+
+def test_only_the_app_pool_registers_its_template_cache():
+    from agent.agent import get_agent_pool
+    from analytics.caching import CACHES
+
+    registered = get_agent_pool()._templates
+    # A batch run or benchmark pool must not take over the app's entry
+    AgentPool(lambda: None, build_agent, lambda llm: None)
+    assert CACHES["agent_templates"] is registered
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from analytics.aggregates import AggregateCube, get_cube
+
+
+def _sales(n=500):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "Product": rng.choice(["Aspirin", "Ibuprofen", "Vitamin C"], n),
+        "Location": rng.choice(["North", "South"], n),
+        "Platform": rng.choice(["Web", "Store"], n),
+        "Date": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 200, n), unit="D"),
+        "Revenue": rng.random(n) * 100,
+        "Units_Sold": rng.integers(1, 10, n),
+        "Inventory_After": rng.integers(0, 100, n).astype(float),
+        "Profit": rng.random(n),
+    })
+    df.loc[::7, "Profit"] = np.nan
+    return df
+
+
+def test_cube_matches_direct_groupbys():
+    df = _sales()
+    cube = AggregateCube.build(df)
+
+    assert np.isclose(cube.total("Revenue"), df["Revenue"].sum())
+    for dim in ["Product", "Location", "Platform"]:
+        expected = df.groupby(dim)["Revenue"].sum()
+        assert np.allclose(cube.by(dim).sort_index(), expected)
+    assert np.allclose(cube.by("Product", "Profit", how="mean").sort_index(), df.groupby("Product")["Profit"].mean())
+    assert np.allclose(cube.by("Product", "Inventory_After", how="min").sort_index(), df.groupby("Product")["Inventory_After"].min())
+    monthly = df.groupby(pd.Grouper(key="Date", freq="ME"))["Revenue"].sum()
+    assert (cube.monthly().index == monthly.index).all()
+    assert np.allclose(cube.monthly(), monthly)
+
+
+def test_cube_cached_per_version(sales):
+    assert get_cube(sales) is get_cube(sales)
+
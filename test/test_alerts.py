@@ -0,0 +1,37 @@
+import json
+
+import pandas as pd
+
+from analytics.alerts import AlertEngine, reference_date, run_alert_job
+
+
+def test_thresholds_use_latest_stock_per_product_and_location(sales):
+    alerts = AlertEngine.build(sales).evaluate("2025-07-21")
+    # Aspirin/North dipped to 5 but was restocked to 45, so it is not low
+    assert alerts.low_stock[["Product", "Location"]].values.tolist() == [
+        ["Insulin", "South"], ["Vitamin C", "North"], ["Ibuprofen", "South"]]
+    assert alerts.reorder["Product"].tolist() == ["Insulin", "Vitamin C", "Ibuprofen", "Aspirin"]
+    assert alerts.low_stock["Inventory_After"].tolist() == [3, 8, 15]
+
+
+def test_expiry_windows_follow_the_reference_date(sales, monkeypatch):
+    engine = AlertEngine.build(sales)
+    alerts = engine.evaluate("2025-07-21", expiry_days=60, risk_days=90)
+    assert alerts.expired["Product"].tolist() == ["Insulin"]
+    assert alerts.expiring["Product"].tolist() == ["Vitamin C", "Aspirin"]
+    assert alerts.expiry_risk["Product"].tolist() == ["Vitamin C", "Aspirin", "Aspirin"]
+
+    later = engine.evaluate("2025-08-02", locations=["South"])
+    assert later.expiring["Product"].tolist() == ["Aspirin"]
+
+    monkeypatch.setenv("BIZBUDDY_REFERENCE_DATE", "2025-07-21")
+    assert reference_date() == pd.Timestamp("2025-07-21")
+    assert "Vitamin C (North): 8 left" in engine.evaluate().summary()
+
+
+def test_alert_job_publishes_json(sales, tmp_path):
+    path = tmp_path / "alerts.json"
+    run_alert_job(sales, str(path), reference="2025-07-21")
+    published = json.loads(path.read_text())
+    assert published["dataset_version"] == sales.attrs["dataset_version"] and published["reference_date"] == "2025-07-21"
+    assert [row["Product"] for row in published["low_stock"]] == ["Insulin", "Vitamin C", "Ibuprofen"]
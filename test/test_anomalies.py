@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from analytics.anomalies import AnomalyService
+
+
+def _rows(n, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Revenue": rng.normal(100, 10, n),
+        "Units_Sold": rng.integers(1, 10, n),
+        "Inventory_After": rng.integers(10, 100, n),
+    })
+
+
+def test_new_versions_score_only_new_rows(tmp_path):
+    service = AnomalyService(min_batch=1000, cache_dir=str(tmp_path))
+    base = _rows(500, 0)
+    base.attrs.update(dataset_name="shop", dataset_version="v1")
+    first = service.flags(base)
+    assert len(first) == 500 and set(first.unique()) <= {-1, 1}
+    assert service.flags(base) is first
+
+    grown = pd.concat([base, _rows(20, 1)], ignore_index=True)
+    grown.attrs.update(dataset_name="shop", dataset_version="v2")
+    second = service.flags(grown)
+    assert service.fit_count == 1
+    assert service.scored_rows == 520
+    assert (second.iloc[:500].to_numpy() == first.to_numpy()).all()
+
+    # A restarted process picks the persisted model up instead of refitting
+    restarted = AnomalyService(cache_dir=str(tmp_path))
+    assert restarted.flags(grown).equals(second)
+    assert restarted.fit_count == 0
@@ -0,0 +1,36 @@
+import json
+
+from agent.agent import main
+from agent.batch import FakeAgentModel, RecordedChatModel, run_batch
+
+
+def test_cli_batch_with_fake_llm(sales_csv, tmp_path, monkeypatch):
+    monkeypatch.setattr("agent.sandbox.SANDBOX_ENABLED", False)
+    questions, out = tmp_path / "q.txt", tmp_path / "answers.jsonl"
+    questions.write_text("top 2 products by revenue\nHow big is the dataset?\n")
+
+    main(["--questions", str(questions), "--out", str(out), "--llm", "fake", "--data", str(sales_csv), "--workers", "2"])
+
+    routed, agent = [json.loads(line) for line in out.read_text().splitlines()]
+    assert routed["route"] == "router" and "Ibuprofen: $90.00" in routed["answer"]
+    assert agent["route"] == "agent" and agent["answer"] == "The dataset answer is 6."
+    assert agent["tool_calls"] == 1 and agent["error"] is None and agent["latency_ms"] > 0
+
+
+def test_cli_batch_with_no_questions(sales_csv, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr("agent.sandbox.SANDBOX_ENABLED", False)
+    questions, out = tmp_path / "q.txt", tmp_path / "answers.jsonl"
+    questions.write_text("")
+
+    main(["--questions", str(questions), "--out", str(out), "--llm", "fake", "--data", str(sales_csv)])
+
+    assert out.read_text() == "" and "No questions" in capsys.readouterr().out
+
+
+def test_recorded_llm_replays_offline(sales, tmp_path, monkeypatch):
+    monkeypatch.setattr("agent.sandbox.SANDBOX_ENABLED", False)
+    recording = str(tmp_path / "llm.jsonl")
+
+    recorded = run_batch(["rows?"], RecordedChatModel(path=recording, inner=FakeAgentModel()), sales, use_router=False)
+    replayed = run_batch(["rows?"], RecordedChatModel(path=recording), sales, use_router=False)
+    assert recorded[0]["answer"] == replayed[0]["answer"] == "The dataset answer is 6."
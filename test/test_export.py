@@ -0,0 +1,24 @@
+import gzip
+import io
+
+import pandas as pd
+
+from data.export import ExportFilter, get_export, iter_export
+
+
+def test_chunked_gzip_csv_matches_plain_csv(sales):
+    chunks = list(iter_export(sales, "csv.gz", chunk_rows=2))
+    assert len(chunks) > 1
+    assert gzip.decompress(b"".join(chunks)).decode() == sales.to_csv(index=False)
+
+
+def test_filtered_parquet_export_is_cached_per_version(sales):
+    filters = ExportFilter(start=pd.Timestamp("2025-07-01"), end=pd.Timestamp("2025-07-20"), locations=("North",))
+    data = get_export(sales, "parquet", filters)
+    assert get_export(sales, "parquet", ExportFilter(start=pd.Timestamp("2025-07-01"), end=pd.Timestamp("2025-07-20"),
+                                                  locations=("North",))) is data
+
+    exported = pd.read_parquet(io.BytesIO(data))
+    # The end date is inclusive of the whole day
+    assert exported["Revenue"].tolist() == [20, 10]
+    assert list(exported.columns) == list(sales.columns)
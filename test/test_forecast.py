@@ -0,0 +1,13 @@
+import numpy as np
+
+from analytics.forecast import HoltForecaster, fit_model, forecast
+
+
+def test_holt_forecasts_every_product_in_one_fit(sales):
+    # A straight line is extrapolated exactly
+    model = HoltForecaster().fit(np.array([[10.0, 20.0, 30.0, 40.0], [5.0, 5.0, 5.0, 5.0]]))
+    assert np.allclose(model.predict(), [50.0, 5.0])
+
+    per_product = forecast(sales, by="Product")
+    assert sorted(per_product.index) == ["Aspirin", "Ibuprofen", "Insulin", "Vitamin C"]
+    assert fit_model(sales, by="Product") is fit_model(sales, by="Product")
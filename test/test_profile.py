@@ -0,0 +1,8 @@
+from data.profile import build_profile, format_profile
+
+
+def test_profile_summarizes_instead_of_sampling_rows(sales):
+    text = format_profile(build_profile(sales))
+    assert "- Product (category): values: Aspirin, Ibuprofen, Insulin, Vitamin C" in text
+    assert "- Date (datetime64[ns]): 2025-05-01 to 2025-07-20" in text
+    assert "|" not in text
@@ -0,0 +1,18 @@
+import pandas as pd
+
+from chat.streamlit_chats import chat_pdf
+from dashboard.report import build_report, get_report
+
+
+def test_report_is_built_from_aggregates_and_cached_per_version(sales):
+    pdf = get_report(sales)
+    assert pdf.startswith(b"%PDF") and get_report(sales) is pdf
+    large = pd.concat([sales] * 10_000, ignore_index=True)
+    large.attrs["dataset_version"] = sales.attrs["dataset_version"] + "-large"
+    # Only aggregates are rendered, so the report doesn't grow with the row count
+    assert len(build_report(large)) < 2 * len(pdf)
+
+
+def test_chat_pdf_handles_non_latin_text():
+    pdf = chat_pdf((("user", "Top products? 🧠"), ("assistant", "1. Aspirin — 12 units")))
+    assert pdf.startswith(b"%PDF")
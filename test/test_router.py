@@ -0,0 +1,146 @@
+from agent.router import IntentRouter, answer_question
+
+
+class StubAgent:
+    def __init__(self):
+        self.questions = []
+
+    def run(self, question):
+        self.questions.append(question)
+        return "from the LLM"
+
+
+def test_top_n_answered_without_llm(sales):
+    agent = StubAgent()
+    answer = answer_question("What are the top 3 selling products by total number of Units_Sold?", agent, sales)
+    assert agent.questions == []
+    assert answer.splitlines()[1:] == ["1. Aspirin: 14", "2. Ibuprofen: 9", "3. Insulin: 3"]
+
+
+def test_filters_and_alerts(sales):
+    router = IntentRouter(sales, today="2025-07-21")
+    assert router.answer("total revenue in North") == "Total Revenue (Location = North): $80.00"
+    assert router.answer("how much revenue since 2025-07-01") == "Total Revenue (from 2025-07-01 to the latest sale): $100.00"
+    assert "Vitamin C (North): 8 left" in router.answer("Which items are low on stock?")
+    # Reorder uses the engine's reorder threshold (30), not the low-stock one
+    assert router.answer("What should I reorder?").splitlines()[1:] == [
+        "- Insulin (South): 3 left", "- Vitamin C (North): 8 left", "- Ibuprofen (South): 15 left",
+        "- Aspirin (South): 25 left"]
+    assert router.answer("what expires within 10 days").splitlines()[1:] == ["- Vitamin C: 2025-07-30"]
+
+
+def test_questions_the_router_would_get_wrong_fall_back(sales):
+    router = IntentRouter(sales, today="2025-07-21")
+    for question in [
+        "What were total sales not in North?",
+        "top products excluding North",
+        "total revenue for Aspirin and Ibuprofen",
+        "top product last year",
+        "total units sold in 2025-07-15 week",
+        "total revenue since 2025-02-30",
+        "total sales in 0000",
+        "expiring within 99999999999 days",
+        "How many units are left in stock?",
+        "Which product has the most recent sale?",
+        "Which product has the most returns?",
+        "Which product has the best revenue growth?",
+        "Which product has the highest price?",
+        "What is the profit margin by location?",
+    ]:
+        assert router.answer(question) is None, question
+    # Prices are not units, and "store" names the location dimension, not the Store platform
+    assert router.answer("What is the average unit price?") == "Average Unit_Price: $10.00"
+    assert router.answer("top product by cost price").splitlines() == ["Top 1 Product by average Cost_Price:", "1. Aspirin: $6.00"]
+    assert router.answer("Which store has the highest revenue?").splitlines() == [
+        "Top 1 Location by total Revenue:", "1. South: $190.00"]
+    assert router.answer("Which products are out of stock?") == "No products out of stock."
+    assert router.answer("total units sold in 2025-07") == "Total Units_Sold (from 2025-07-01 to 2025-07-31): 10"
+    assert router.answer("Which products have already expired?").splitlines()[1:] == ["- Insulin: expired 2025-07-01"]
+    expired = IntentRouter(sales, today="2025-09-01").answer("Which products have already expired?")
+    assert expired.splitlines()[1:] == [
+        "- Insulin: expired 2025-07-01", "- Vitamin C: expired 2025-07-30", "- Aspirin: expired 2025-08-01"]
+
+
+def test_unmatched_questions_fall_back_to_agent(sales):
+    agent = StubAgent()
+    assert answer_question("Why did sales dip in June?", agent, sales) == "from the LLM"
+    assert answer_question("How many products do we carry?", agent, sales) == "from the LLM"
+    assert len(agent.questions) == 2
+
+
+def test_fast_path_answers_reach_the_agents_memory(sales):
+    from agent.memory import build_memory
+
+    agent = StubAgent()
+    agent.memory = build_memory(None, mode="buffer")
+    answer = answer_question("total revenue in North", agent, sales)
+    assert agent.questions == []
+    # A follow-up such as "why is that?" sees the routed turn
+    history = agent.memory.load_memory_variables({})["chat_history"]
+    assert [m.content for m in history] == ["total revenue in North", answer]
+
+
+def _bag_of_words(question):
+    import zlib
+
+    import numpy as np
+
+    from agent.response_cache import normalize_question
+
+    vector = np.zeros(256)
+    for token in normalize_question(question).split():
+        vector[zlib.crc32(token.encode()) % 256] += 1
+    return vector
+
+
+def test_response_cache_reuses_agent_answers(sales):
+    from agent.response_cache import ResponseCache
+
+    agent, cache, df = StubAgent(), ResponseCache(), sales
+    answer_question("Why did sales dip in June?", agent, df, cache=cache)
+    answer_question("why did sales dip in june", agent, df, cache=cache)
+    # Without an embedding only the normalized question matches
+    answer_question("In June, why did the sales dip?", agent, df, cache=cache)
+    assert len(agent.questions) == 2
+    assert cache.stats()["exact_hits"] == 1 and cache.stats()["semantic_hits"] == 0
+
+    # Follow-ups are never served from the cache
+    answer_question("Why did it dip?", agent, df, cache=cache)
+    assert len(agent.questions) == 3
+
+    # Tenants sharing the process keep separate entries
+    other = df.copy(deep=False)
+    other.attrs.update(dataset_name="other-store")
+    answer_question("Why did sales dip in June?", agent, other, cache=cache)
+    answer_question("Why did sales dip in June?", agent, df, cache=cache)
+    answer_question("Why did sales dip in June?", agent, other, cache=cache)
+    assert len(agent.questions) == 4
+
+    # A new dataset version empties that dataset's entries only
+    df.attrs["dataset_version"] += "-next"
+    answer_question("Why did sales dip in June?", agent, df, cache=cache)
+    answer_question("Why did sales dip in June?", agent, other, cache=cache)
+    assert len(agent.questions) == 5
+
+
+def test_semantic_matches_must_agree_on_entities_periods_and_direction(sales):
+    from agent.response_cache import ResponseCache
+
+    agent, cache, df = StubAgent(), ResponseCache(embed=_bag_of_words), sales
+    answer_question("Why did sales dip in June?", agent, df, cache=cache)
+    answer_question("In June, why did the sales dip?", agent, df, cache=cache)
+    assert len(agent.questions) == 1 and cache.stats()["semantic_hits"] == 1
+
+    for first, second in [
+        ("Why did revenue for Aspirin in the North region drop compared with Ibuprofen?",
+         "Why did revenue for Aspirin in the South region drop compared with Ibuprofen?"),
+        ("Why is revenue increasing for Aspirin while Vitamin C is decreasing?",
+         "Why is revenue increasing for Vitamin C while Aspirin is decreasing?"),
+        ("Why did sales dip in June?", "Why did sales dip in 2024?"),
+        ("Why did sales dip in June?", "Why did sales rise in June?"),
+        ("Why did sales dip in June?", "Why did sales dip in July?"),
+    ]:
+        asked = len(agent.questions)
+        answer_question(first, agent, df, cache=cache)
+        answer_question(second, agent, df, cache=cache)
+        assert agent.questions[asked:][-1] == second, second
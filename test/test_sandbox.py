@@ -0,0 +1,100 @@
+import os
+
+import pandas as pd
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from agent.agent import build_agent
+from agent.sandbox import STATELESS_PROMPT, SandboxedPythonTool, SandboxPool, close_sandboxes, get_sandbox
+from analytics.caching import evict_version
+from data.cache import cache_path, write_cache
+
+
+@pytest.fixture(scope="module")
+def pool(tmp_path_factory):
+    df = pd.DataFrame({
+        "Product": pd.Categorical(["Aspirin", "Ibuprofen", "Aspirin"]),
+        "Location": ["North", "South", "North"],
+        "Units_Sold": [5, 9, 7], "Revenue": [50.0, 90.0, 70.0], "Cost_Price": [1, 1, 1],
+        "Unit_Price": [2, 2, 2], "Profit": [1, 1, 1], "Inventory_After": [4, 3, 2],
+        "Date": pd.to_datetime(["2025-01-01", "2025-01-02", "2025-01-03"]),
+    })
+    cache_dir = str(tmp_path_factory.mktemp("sandbox"))
+    write_cache(cache_dir, "frame", df, {"version": "test"})
+    pool = SandboxPool(cache_path(cache_dir, "frame"), workers=1, timeout=5, cpu_seconds=1, memory_mb=1024)
+    yield pool
+    pool.close()
+
+
+def test_runs_code_against_shared_dataset(pool):
+    assert pool.run("df.groupby('Product', observed=True)['Revenue'].sum().idxmax()") == "Aspirin"
+    assert pool.run("x = 2\nprint(x * 21)") == "42\n"
+    # Each snippet starts from a fresh namespace
+    assert pool.run("x").startswith("NameError")
+
+
+def test_runaway_code_is_killed_and_worker_replaced(pool):
+    assert pool.run("while True: pass").startswith(("ResourceError", "TimeoutError"))
+    assert pool.run("bytearray(4 * 1024 ** 3)").startswith("MemoryError")
+    assert pool.run("len(df)") == "3"
+
+
+def test_worker_sees_neither_the_apps_environment_nor_its_directory(pool, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-secret")
+    fresh = SandboxPool(pool.path, workers=1, timeout=5, memory_mb=1024)
+    try:
+        assert fresh.run("import os\nprint('OPENAI_API_KEY' in os.environ)") == "False\n"
+        # load_dotenv() finds .env in the app's directory; the worker starts in an empty one
+        assert fresh.run("import os\nos.listdir('.')") == "[]"
+    finally:
+        fresh.close()
+
+
+def test_evicted_pools_delete_their_dataset_copy(tmp_path, monkeypatch):
+    monkeypatch.setenv("BIZBUDDY_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr("agent.sandbox.SANDBOX_POOLS", 1)
+    frames = [pd.DataFrame({"Revenue": [1.0, 2.0]}) for _ in range(2)]
+    frames[0].attrs["dataset_version"] = "sandbox-a"
+    try:
+        get_sandbox(frames[0])
+        # Evicting a data version (e.g. a tenant's) closes its pool as well
+        evict_version("sandbox-a")
+        assert list(tmp_path.glob("sandbox-*.arrow")) == []
+        get_sandbox(frames[0])
+        get_sandbox(frames[1])  # unversioned, evicts the first pool
+        assert [p.name for p in tmp_path.glob("sandbox-*.arrow")] == [f"sandbox-{os.getpid()}-frame-{id(frames[1])}.arrow"]
+    finally:
+        close_sandboxes()
+    assert list(tmp_path.glob("sandbox-*.arrow")) == []
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Replays canned messages: a tool call with known code, then an answer."""
+
+    messages: list
+    seen: list = []
+
+    @property
+    def _llm_type(self):
+        return "scripted"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.seen.append(messages)
+        return ChatResult(generations=[ChatGeneration(message=self.messages[len(self.seen) - 1])])
+
+
+def test_agent_runs_fake_llm_code_in_sandbox(pool, monkeypatch):
+    monkeypatch.setattr("agent.agent.make_python_tool", lambda df: SandboxedPythonTool(pool=pool))
+    code = "df['Units_Sold'].sum()"
+    llm = ScriptedChatModel(messages=[
+        AIMessage(content="", tool_calls=[{"name": "python_repl_ast", "args": {"query": code}, "id": "call_1"}]),
+        AIMessage(content="We sold 21 units."),
+    ])
+    agent = build_agent(llm, pd.read_feather(pool.path))
+    assert agent.invoke({"input": "How many units did we sell?"})["output"] == "We sold 21 units."
+    # The tool result the model saw came from the sandbox worker
+    assert llm.seen[1][-1].content == "21"
+    # and the model was told snippets don't share variables
+    assert STATELESS_PROMPT in llm.seen[0][0].content
@@ -0,0 +1,78 @@
+import os
+import time
+
+import pandas as pd
+
+import analytics.scheduler as scheduler
+from analytics.scheduler import ArtifactScheduler
+from data.store import DatasetStore
+
+
+def _tasks():
+    def broken(df):
+        raise RuntimeError("model exploded")
+
+    return {"cube": scheduler.TASKS["cube"], "alerts": scheduler.TASKS["alerts"], "broken": broken}
+
+
+def test_publishes_one_complete_set_per_dataset_version(sales_csv, monkeypatch):
+    monkeypatch.setenv("BIZBUDDY_REFERENCE_DATE", "2025-07-21")
+    store = DatasetStore({"local": str(sales_csv)}, ttl=0)
+    worker = ArtifactScheduler(store=store, dataset="local", tasks=_tasks())
+
+    first = worker.run_once()
+    assert first.values["cube"].total("Revenue") == 270
+    assert first.values["alerts"].low_stock["Product"].tolist() == ["Insulin", "Vitamin C", "Ibuprofen"]
+    assert "RuntimeError" in first.errors["broken"]
+    # Same version and date: nothing is recomputed
+    assert worker.run_once() is first and worker.build_count == 1
+
+    sales_csv.write_text(sales_csv.read_text() + "2025-07-15,Aspirin,North,Store,1,10,6,10,4,44,2025-08-01\n")
+    os.utime(sales_csv, ns=(time.time_ns() + 10**9,) * 2)
+    second = worker.run_once()
+    assert second.version != first.version and second.values["cube"].total("Revenue") == 280
+    assert worker.latest(first.version) is None and worker.latest(second.version) is second
+
+
+def test_views_read_published_artifacts_or_compute_inline(sales_csv, monkeypatch):
+    store = DatasetStore({"local": str(sales_csv)}, ttl=0)
+    worker = ArtifactScheduler(store=store, dataset="local", tasks=_tasks(), interval=0.05).start()
+    try:
+        deadline = time.monotonic() + 10
+        while worker.latest() is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        published = worker.latest()
+        assert published is not None
+    finally:
+        worker.stop()
+
+    df = store.get("local").view()
+    monkeypatch.setattr(scheduler, "_scheduler", worker)
+    assert scheduler.artifact(df, "cube") is published.values["cube"]
+
+    # Frames the worker hasn't seen are computed on the spot
+    other = pd.DataFrame({"Date": pd.to_datetime(["2025-01-01"]), "Revenue": [5.0], "Units_Sold": [1],
+                          "Inventory_After": [3]})
+    assert scheduler.artifact(other, "cube").total("Revenue") == 5
+
+
+def test_every_resident_tenant_is_precomputed_without_touching_lru_order(sales_csv):
+    from data.tenants import TenantRegistry
+
+    tenants = {}
+    for name in ["north", "south", "east"]:
+        path = sales_csv.with_name(f"{name}.csv")
+        path.write_text(sales_csv.read_text().replace("Aspirin", name.title()))
+        tenants[name] = str(path)
+    registry = TenantRegistry(tenants, memory_budget=10**9, ttl=60)
+    south, north = registry.get("south").view(), registry.get("north").view()
+    worker = ArtifactScheduler(store=registry, dataset="north", tasks={"cube": scheduler.TASKS["cube"]})
+
+    assert worker.run_once() is worker.latest(north.attrs["dataset_version"])
+    assert worker.latest(south.attrs["dataset_version"]) is not None
+    # east was never requested, and south stays the least recently used
+    assert list(registry.usage()) == ["south", "north"] and worker.build_count == 2
+
+    registry.evict("south")
+    worker.run_once()
+    assert worker.latest(south.attrs["dataset_version"]) is None and worker.build_count == 2
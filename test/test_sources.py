@@ -0,0 +1,100 @@
+import io
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from agent.router import IntentRouter
+from analytics.aggregates import AggregateCube, get_cube
+from analytics.alerts import AlertEngine, get_alert_engine
+from data.export import ExportFilter, get_export
+from data.profile import get_profile_text
+from data.sources import ParquetSource, SQLSource, load_rows, pushdown_source
+from data.store import DatasetStore
+
+QUESTIONS = [
+    "What are the top 3 selling products by total number of Units_Sold?",
+    "total revenue in North",
+    "how much revenue since 2025-07-01",
+    "average revenue by location",
+]
+
+
+@pytest.fixture(params=["sqlite", "parquet"])
+def location(request, raw_sales, tmp_path):
+    if request.param == "sqlite":
+        path = tmp_path / "sales.db"
+        with sqlite3.connect(path) as connection:
+            raw_sales.to_sql("sales", connection, index=False)
+        return f"sqlite:///{path}?table=sales"
+    path = tmp_path / "sales.parquet"
+    raw_sales.assign(**{"Order Date": pd.to_datetime(raw_sales["Order Date"])}).to_parquet(path, row_group_size=2)
+    return str(path)
+
+
+def test_store_keeps_engine_rows_in_the_source_until_needed(location):
+    store = DatasetStore({"local": location}, ttl=0)
+    snapshot = store.get("local")
+    assert isinstance(store.source("local"), (SQLSource, ParquetSource))
+    # The snapshot holds the schema only; rows load on demand, once per version
+    assert snapshot.lazy and len(snapshot.frame) == 0 and "Date" in snapshot.frame.columns
+    assert store.get("local") is snapshot and store.parse_count == 1
+    rows = load_rows(snapshot.view())
+    assert rows["Date"].dtype.kind == "M" and len(rows) == 6
+    assert rows.attrs["dataset_version"] == snapshot.version and not rows.attrs["dataset_lazy"]
+    assert load_rows(snapshot.view()).values.tolist() == rows.values.tolist()
+
+
+def test_dashboard_artifacts_come_from_the_source_alone(location, monkeypatch):
+    df = DatasetStore({"local": location}, ttl=0).get("local").view()
+    loaded = load_rows(df)
+
+    def no_full_load(self, payload):
+        raise AssertionError("rows loaded")
+
+    monkeypatch.setattr(type(pushdown_source(df)), "load", no_full_load)
+    pushed, local = get_alert_engine(df).evaluate("2025-07-21"), AlertEngine.build(loaded).evaluate("2025-07-21")
+    for kind in ["low_stock", "reorder", "expiring", "expiry_risk"]:
+        actual, expected = getattr(pushed, kind), getattr(local, kind)
+        assert actual[["Product", "Location"]].astype(str).values.tolist() == \
+            expected[["Product", "Location"]].astype(str).values.tolist(), kind
+    assert "`df` has 6 rows." in get_profile_text(df)
+    monkeypatch.undo()
+    # Exports are one of the places that do read every row
+    assert get_export(df, "csv").count(b"\n") == 7
+
+
+def test_filtered_exports_read_only_the_matching_rows(location, monkeypatch):
+    df = DatasetStore({"local": location}, ttl=0).get("local").view()
+    filters = ExportFilter(start=pd.Timestamp("2025-07-01"), end=pd.Timestamp("2025-07-20"),
+                           products=("Aspirin", "Vitamin C"))
+    expected = filters.apply(load_rows(df)).reset_index(drop=True)
+
+    def no_full_load(self, *args):
+        raise AssertionError("every row loaded")
+
+    monkeypatch.setattr(type(pushdown_source(df)), "load", no_full_load)
+    monkeypatch.setattr(type(pushdown_source(df)), "frame", no_full_load)
+    exported = pd.read_parquet(io.BytesIO(get_export(df, "parquet", filters)))
+    assert exported["Product"].astype(str).tolist() == ["Aspirin", "Aspirin", "Vitamin C"]
+    assert list(exported.columns) == list(expected.columns)
+    assert exported.astype(str).values.tolist() == expected.astype(str).values.tolist()
+
+
+def test_aggregates_and_answers_are_pushed_down(location):
+    df = DatasetStore({"local": location}, ttl=0).get("local").view()
+    assert pushdown_source(df) is not None
+
+    pushed, local = get_cube(df), AggregateCube.build(load_rows(df))
+    for dimension, metric, how in [("Product", "Revenue", "sum"), ("Location", "Profit", "mean"),
+                                   ("Platform", "Units_Sold", "count"), ("Product", "Inventory_After", "min")]:
+        expected = local.by(dimension, metric, how).sort_index()
+        actual = pushed.by(dimension, metric, how).sort_index()
+        assert actual.to_dict() == pytest.approx(expected.to_dict())
+    assert pushed.monthly("Revenue").to_dict() == local.monthly("Revenue").to_dict()
+
+    # Same answers as the pandas path on the loaded rows
+    in_memory = load_rows(df).copy(deep=False)
+    in_memory.attrs = {}
+    for question in QUESTIONS:
+        assert IntentRouter(df).answer(question) == IntentRouter(in_memory).answer(question)
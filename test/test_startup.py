@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VIEW_MODULES = ["chat.streamlit_chats", "dashboard.streamlit_dashboards", "dashboard.streamlit_dashboard"]
+HEAVY_MODULES = ["tensorflow", "sklearn", "pdfkit"]
+IMPORT_BUDGET = float(os.getenv("BIZBUDDY_IMPORT_BUDGET", "3.0"))
+
+PROBE = f"""
+import sys, time
+start = time.perf_counter()
+for name in {VIEW_MODULES!r}:
+    __import__(name)
+print(time.perf_counter() - start)
+print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))
+"""
+
+
+def test_view_modules_cold_import_within_budget():
+    # Fresh interpreter so nothing is already imported
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    elapsed, heavy = result.stdout.split("\n")[:2]
+    assert heavy == "", f"view modules imported heavy dependencies: {heavy}"
+    assert float(elapsed) < IMPORT_BUDGET, f"cold import took {float(elapsed):.2f}s (budget {IMPORT_BUDGET}s)"
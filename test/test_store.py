@@ -0,0 +1,59 @@
+from data.store import DatasetStore
+
+CSV = (
+    "Order Date,Product,Location,Units_Sold,Revenue,Inventory_After,Product_Expiry_Date\n"
+    "2025-01-05,Aspirin,North,3,30.5,12,2025-08-01\n"
+    "2025-02-10,Ibuprofen,South,x,40,25,2025-09-15\n"
+)
+
+
+def test_store_normalizes_and_skips_unchanged(tmp_path):
+    path = tmp_path / "sales.csv"
+    path.write_text(CSV)
+    store = DatasetStore({"local": str(path)}, ttl=0)
+
+    first = store.get("local")
+    assert {"Date", "Expiry Date"} <= set(first.frame.columns)
+    assert str(first.frame["Date"].dtype).startswith("datetime64")
+    assert first.frame["Units_Sold"].isna().sum() == 1
+
+    # Unchanged source: no re-parse, same snapshot
+    assert store.get("local") is first
+    assert store.parse_count == 1
+
+    path.write_text(CSV + "2025-03-01,Aspirin,North,1,10,11,2025-10-01\n")
+    second = store.get("local")
+    assert second.version != first.version
+    assert len(second.frame) == 3
+    assert store.parse_count == 2
+
+
+def test_disk_cache_survives_restart(tmp_path):
+    path = tmp_path / "sales.csv"
+    path.write_text(CSV)
+    cache_dir = str(tmp_path / "cache")
+
+    first = DatasetStore({"local": str(path)}, ttl=0, cache_dir=cache_dir).get("local")
+
+    # A fresh process maps the cached frame; the unchanged file is not re-parsed
+    restarted = DatasetStore({"local": str(path)}, ttl=0, cache_dir=cache_dir)
+    again = restarted.get("local")
+    assert restarted.parse_count == 0
+    assert again.version == first.version
+    assert again.frame["Date"].equals(first.frame["Date"])
+
+
+def test_views_are_compact_and_isolated(tmp_path):
+    path = tmp_path / "sales.csv"
+    path.write_text(CSV)
+    snapshot = DatasetStore({"local": str(path)}, ttl=0).get("local")
+    assert snapshot.frame["Product"].dtype == "category"
+    # Measures keep full width so arithmetic on them can't overflow
+    assert snapshot.frame["Inventory_After"].dtype == "int64"
+    assert (snapshot.frame["Inventory_After"] * 100).max() == snapshot.frame["Inventory_After"].max() * 100
+
+    view = snapshot.view()
+    view["Anomaly"] = -1
+    view.loc[0, "Revenue"] = 0
+    assert "Anomaly" not in snapshot.frame.columns
+    assert snapshot.frame.loc[0, "Revenue"] == 30.5
@@ -0,0 +1,40 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from agent.streaming import stream_agent
+
+
+class FakeStreamingAgent:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.cancelled = False
+
+    async def astream_events(self, inputs, config=None, version=None):
+        try:
+            yield {"event": "on_tool_start", "name": "python_repl_ast", "data": {"input": "df.shape"}, "parent_ids": ["x"]}
+            yield {"event": "on_tool_end", "name": "python_repl_ast", "data": {"output": "(4, 7)"}, "parent_ids": ["x"]}
+            for token in ["There ", "are ", "4 rows."]:
+                await asyncio.sleep(self.delay)
+                yield {"event": "on_chat_model_stream", "data": {"chunk": SimpleNamespace(content=token)}, "parent_ids": ["x"]}
+            yield {"event": "on_chain_end", "name": "AgentExecutor", "data": {"output": {"output": "There are 4 rows."}}, "parent_ids": []}
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+def test_stream_yields_tool_steps_tokens_and_answer():
+    events = list(stream_agent(FakeStreamingAgent(), "how many rows?"))
+    assert events[0] == ("tool", "python_repl_ast", "df.shape")
+    assert [e[1] for e in events if e[0] == "token"] == ["There ", "are ", "4 rows."]
+    assert events[-1] == ("final", "There are 4 rows.")
+
+
+def test_timeout_cancels_the_agent_run():
+    agent = FakeStreamingAgent(delay=1.0)
+    with pytest.raises(TimeoutError):
+        list(stream_agent(agent, "how many rows?", timeout=0.2))
+    time.sleep(0.1)
+    assert agent.cancelled
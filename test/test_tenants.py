@@ -0,0 +1,78 @@
+from agent.agent import build_agent
+from agent.memory import build_memory
+from agent.pool import AgentPool
+from analytics.aggregates import get_cube
+from analytics.anomalies import AnomalyService
+from analytics.caching import CACHES
+from data.tenants import TenantRegistry
+
+
+def _registry(sales_csv, names, memory_budget):
+    # Each tenant sells its own product in place of Aspirin
+    tenants = {}
+    for name in names:
+        path = sales_csv.with_name(f"{name}.csv")
+        path.write_text(sales_csv.read_text().replace("Aspirin", name.title()))
+        tenants[name] = str(path)
+    return TenantRegistry(tenants, memory_budget=memory_budget, ttl=60)
+
+
+def test_least_recently_used_tenant_is_evicted_over_budget(sales_csv, monkeypatch):
+    registry = _registry(sales_csv, ["north", "south", "east"], memory_budget=10**9)
+    one_tenant = registry.get("north").frame.memory_usage(deep=True).sum()
+    registry.memory_budget = int(one_tenant * 2.5)
+
+    registry.get("south")
+    registry.get("north")
+    registry.get("east")
+
+    # south was least recently used; north and east stay resident
+    assert list(registry.usage()) == ["north", "east"]
+    assert registry.evictions == 1
+    # Sizes are measured once per data version, not on every request
+    measured = []
+    monkeypatch.setattr("data.tenants.snapshot_bytes", lambda snapshot: measured.append(snapshot) or one_tenant)
+    registry.get("north")
+    assert measured == []
+
+    # An evicted tenant simply reloads on its next request
+    assert registry.get("south").frame["Product"].iloc[0] == "South"
+    assert "south" in registry.usage()
+
+
+def test_eviction_drops_the_tenants_derived_artifacts(sales_csv, monkeypatch):
+    registry = _registry(sales_csv, ["north", "south"], memory_budget=10**9)
+    anomalies = AnomalyService(min_batch=1000, cache_dir=str(sales_csv.parent / "models"))
+    monkeypatch.setitem(CACHES, "anomaly_results", anomalies)
+    north = registry.get("north").view()
+    south = registry.get("south").view()
+    get_cube(north), get_cube(south)
+    flags = anomalies.flags(north), anomalies.flags(south)
+    cubes = CACHES["cubes"]
+    assert cubes.get(north.attrs["dataset_version"]) is not None
+
+    registry.evict("north")
+
+    assert cubes.get(north.attrs["dataset_version"]) is None
+    assert cubes.get(south.attrs["dataset_version"]) is not None
+    # The fitted model leaves memory too; it comes back from disk, unrefitted
+    assert anomalies.stats()["size"] == 1 and list(anomalies._states) == ["south"]
+    assert anomalies.flags(south) is flags[1]
+    assert anomalies.flags(north).equals(flags[0]) and anomalies.fit_count == 2
+    assert list(registry.usage()) == ["south"]
+
+
+def test_session_memory_does_not_follow_the_user_to_another_tenant(sales_csv, monkeypatch):
+    from langchain_openai import ChatOpenAI
+
+    monkeypatch.setattr("agent.sandbox.SANDBOX_ENABLED", False)
+    registry = _registry(sales_csv, ["north", "south"], memory_budget=10**9)
+    pool = AgentPool(lambda: ChatOpenAI(model="gpt-3.5-turbo", api_key="test"), build_agent,
+                     lambda llm: build_memory(llm, mode="buffer"))
+    session = {}
+
+    agent = pool.session_agent(session, registry.get("north").view())
+    agent.memory.save_context({"input": "north question"}, {"output": "north answer"})
+    agent = pool.session_agent(session, registry.get("south").view())
+
+    assert agent.memory.load_memory_variables({})["chat_history"] == []
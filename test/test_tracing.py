@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from analytics.caching import VersionedCache
+from analytics.tracing import Tracer
+
+
+def test_spans_feed_rerun_histograms_and_log(tmp_path):
+    log = tmp_path / "trace.jsonl"
+    tracer = Tracer(log_path=str(log), buckets=(0.5, float("inf")))
+    tracer.begin_rerun()
+
+    @tracer.traced()
+    def load_data():
+        return 42
+
+    with tracer.span("dashboard_view"):
+        assert load_data() == 42
+    with pytest.raises(ValueError):
+        with tracer.span("agent.run"):
+            raise ValueError("boom")
+
+    spans = tracer.rerun_spans()
+    assert [(s["name"], s["depth"]) for s in spans] == [("load_data", 1), ("dashboard_view", 0), ("agent.run", 0)]
+    assert spans[-1]["error"] == "ValueError"
+    assert [json.loads(line)["name"] for line in log.read_text().splitlines()] == ["load_data", "dashboard_view", "agent.run"]
+
+    stats = tracer.snapshot()
+    assert stats["load_data"]["count"] == 1 and stats["load_data"]["buckets"] == [1, 1]
+    assert stats["agent.run"]["errors"] == 1
+
+    # A new rerun starts with an empty span list; the histograms keep counting
+    tracer.begin_rerun()
+    load_data()
+    assert [s["name"] for s in tracer.rerun_spans()] == ["load_data"]
+    assert tracer.snapshot()["load_data"]["count"] == 2
+
+
+def test_prometheus_export_includes_cache_ratios(tmp_path):
+    tracer = Tracer(buckets=(0.5, float("inf")))
+    with tracer.span("load_data"):
+        pass
+    cache = VersionedCache(name="test_cubes")
+    cache.get_or_compute("v1", lambda: "cube")
+    cache.get_or_compute("v1", lambda: "cube")
+
+    text = tracer.prometheus()
+    assert 'bizbuddy_span_duration_seconds_bucket{span="load_data",le="+Inf"} 1' in text
+    assert 'bizbuddy_span_duration_seconds_count{span="load_data"} 1' in text
+    assert 'bizbuddy_cache_hits_total{cache="test_cubes"} 1' in text
+    assert 'bizbuddy_cache_misses_total{cache="test_cubes"} 1' in text
+    assert cache.stats()["hit_ratio"] == 0.5
+
+    path = tmp_path / "metrics.prom"
+    tracer.write_prometheus(str(path))
+    assert path.read_text() == text